@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Defines the views of handling amenities in the API"""
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 from flask import make_response, jsonify, request
 from models import storage
 from models.amenity import Amenity
@@ -8,7 +9,7 @@ from werkzeug.exceptions import MethodNotAllowed, BadRequest, NotFound
 
 
 @app_views.route("/amenities", methods=['GET', 'POST'])
-@app_views.route("/amenities/<amenity_id>", methods=['GET', 'DELETE', 'POST'])
+@app_views.route("/amenities/<amenity_id>", methods=['GET', 'DELETE', 'PUT'])
 def amenity_handler(amenity_id=None):
     """Handler function for the amenities endpoint"""
     handlers = {
@@ -25,22 +26,19 @@ def amenity_handler(amenity_id=None):
 
 def getAmenities(amenity_id=None):
     """Gets and retrieves all amenities or a amenity based on ID"""
-    amenity_objs = storage.all(Amenity).values()
     if amenity_id:
-        amenity_list = list(filter(lambda x: x.id == amenity_id, amenity_objs))
-        if amenity_list:
-            return make_response(jsonify(amenity_list[0].to_dict()))
+        amenity_obj = storage.get(Amenity, amenity_id)
+        if amenity_obj:
+            return make_response(jsonify(amenity_obj.to_dict()))
         raise NotFound()
-    amenity_objs = list(map(lambda x: x.to_dict(), amenity_objs))
-    return make_response(jsonify(amenity_objs))
+    return paginate(Amenity)
 
 
 def deleteAmenities(amenity_id=None):
     """Delete a amenity object based on ID"""
-    amenity_objs = storage.all(Amenity).values()
-    amenity_list = list(filter(lambda x: x.id == amenity_id, amenity_objs))
-    if amenity_list:
-        storage.delete(amenity_list[0])
+    amenity_obj = storage.get(Amenity, amenity_id)
+    if amenity_obj:
+        storage.delete(amenity_obj)
         storage.save()
         return make_response(jsonify({}), 200)
     raise NotFound()
@@ -61,13 +59,11 @@ def postAmenities(amenity_id=None):
 def putAmenities(amenity_id=None):
     """Puts or updates a amenity based on ID"""
     immut_attrs = ("id", "created_at", "updated_at")
-    amenity_objs = storage.all(Amenity).values()
-    amenity_list = list(filter(lambda x: x.id == amenity_id, amenity_objs))
-    if amenity_list:
+    prev_amenity = storage.get(Amenity, amenity_id)
+    if prev_amenity:
         amenity_data = request.get_json()
         if type(amenity_data) is not dict:
             raise BadRequest(description="Not a JSON")
-        prev_amenity = amenity_list[0]
         for key, value in amenity_data.items():
             if key not in immut_attrs:
                 setattr(prev_amenity, key, value)
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""Defines the view creating many objects in one request"""
+from api.v1.views import app_views
+from flask import jsonify, make_response, request
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from os import getenv
+from werkzeug.exceptions import BadRequest
+
+# the most objects a batch can create
+MAX_BATCH = int(getenv("HBNB_API_MAX_BATCH", "10000"))
+# the classes a batch creates, in order, with their required fields and
+# the classes their references point to
+BATCH_CLASSES = (
+    (State, ("name",), {}),
+    (Amenity, ("name",), {}),
+    (User, ("email", "password"), {}),
+    (City, ("name",), {"state_id": State}),
+    (Place, ("name",), {"city_id": City, "user_id": User}),
+    (Review, ("text",), {"place_id": Place, "user_id": User}),
+)
+
+
+@app_views.route("/batch", methods=['POST'])
+def postBatch():
+    """Posts or adds the objects listed under their class name, at once"""
+    batch = request.get_json()
+    if type(batch) is not dict:
+        raise BadRequest(description="Not a JSON")
+    names = {cls.__name__ for cls, required, refs in BATCH_CLASSES}
+    for name, items in batch.items():
+        if name not in names or type(items) is not list:
+            raise BadRequest(description="Invalid batch")
+    if sum(map(len, batch.values())) > MAX_BATCH:
+        raise BadRequest(description="Batch too large")
+    created = {}
+    for cls, required, refs in BATCH_CLASSES:
+        items = batch.get(cls.__name__, [])
+        for i, item in enumerate(items):
+            if type(item) is not dict:
+                raise BadRequest(description="Not a JSON")
+            for field in required + tuple(refs):
+                if field not in item:
+                    raise BadRequest(description="Missing {} in {} {}".format(
+                        field, cls.__name__, i))
+            for field in refs:
+                if type(item[field]) is not str:
+                    raise BadRequest(description="Invalid {} in {} {}".format(
+                        field, cls.__name__, i))
+            if type(item.get("id", "")) is not str:
+                raise BadRequest(description="Invalid id in {} {}".format(
+                    cls.__name__, i))
+        ids = [item["id"] for item in items if "id" in item]
+        if len(set(ids)) < len(ids) or ids and storage.find(
+                cls, where=[("id", "in", ids)], limit=1):
+            raise BadRequest(description="Duplicate id in {}".format(
+                cls.__name__))
+        for field, ref_cls in refs.items():
+            ids = {item[field] for item in items}
+            known = {obj.id for obj in created.get(ref_cls, ())} & ids
+            if ids - known:
+                known |= {obj.id for obj in storage.find(
+                    ref_cls, where=[("id", "in", list(ids - known))])}
+            if ids - known:
+                raise BadRequest(description="Unknown {} in {}".format(
+                    field, cls.__name__))
+        created[cls] = [cls(**item) for item in items]
+    objs = [obj for objs in created.values() for obj in objs]
+    storage.bulk_new(objs)
+    return make_response(jsonify({cls.__name__: [obj.to_dict()
+                                                 for obj in objs]
+                                  for cls, objs in created.items()
+                                  if objs}), 201)
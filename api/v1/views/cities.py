@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Defines the views of handling cities in the API"""
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 from flask import jsonify, make_response, request
 from models import storage, storage_t
 from models.state import State
@@ -30,8 +31,7 @@ def getCities(state_id=None, city_id=None):
     if state_id:
         state_list = storage.get(State, state_id)
         if state_list:
-            cty_in_sts = list(map(lambda x: x.to_dict(), state_list.cities))
-            return make_response(jsonify(cty_in_sts))
+            return paginate(City, filter_by={"state_id": state_id})
     elif city_id:
         city_list = storage.get(City, city_id)
         if city_list:
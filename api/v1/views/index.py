@@ -3,6 +3,11 @@
 from flask import jsonify
 from api.v1.views import app_views
 from models import storage
+from os import getenv
+from werkzeug.exceptions import NotFound
+
+# whether the /internal endpoints are served
+INTERNAL = getenv("HBNB_API_INTERNAL") == "1"
 
 
 @app_views.route("/status")
@@ -22,6 +27,18 @@ def getStats():
             "states": 'State',
             "users": 'User'
     }
+    counts = storage.counts()
     for key, val in obj_types.items():
-        obj_types[key] = storage.count(val)
+        obj_types[key] = counts.get(val, 0)
     return jsonify(obj_types)
+
+
+@app_views.route("/internal/pool")
+def getPoolStats():
+    """Gets and returns the statistics of the storage connection pool"""
+    if not INTERNAL:
+        raise NotFound()
+    stats = storage.pool_stats()
+    if stats is None:
+        raise NotFound()
+    return jsonify(stats)
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+"""
+Defines the keyset pagination and streaming shared by the list endpoints
+
+A list endpoint pages when its request has a limit or an after query
+parameter. Objects come in (created_at, id) order, unless the endpoint
+picks another PageOrder, like text_order() for text searches, and after is
+the cursor the previous page ended on: either an id or its values joined
+by commas, like "<created_at>,<id>".
+When more objects follow, the response links the next page in a Link
+header and sends its cursor in X-Next-Cursor.
+
+Lists are streamed: each object is serialized only when the response body
+reaches it, as a JSON array, or as one JSON document per line when the
+client accepts application/x-ndjson better than application/json. A list
+without a limit is read from storage a MAX_LIMIT page at a time.
+"""
+from datetime import datetime
+from flask import current_app, request, Response, stream_with_context
+from models import storage
+from models.base_model import parse_time
+from models.engine.query import sort_key
+from os import getenv
+from urllib.parse import urlencode
+from werkzeug.exceptions import BadRequest
+
+MAX_LIMIT = int(getenv("HBNB_API_MAX_LIMIT", "1000"))
+# the number of bytes gathered before a chunk of the body is sent
+CHUNK_SIZE = 1 << 16
+NDJSON = "application/x-ndjson"
+
+
+class PageOrder:
+    """an order pages are read in, and the cursors that go with it"""
+
+    def __init__(self, fields, key, parsers):
+        """Instantiate an order on fields
+
+        key returns the values of the fields for an object, and parsers
+        hold one function per field reading its value back from a cursor.
+        """
+        self.fields = fields
+        self.key = key
+        self.parsers = parsers
+
+    def cursor(self, obj):
+        """returns the cursor of the page ending on obj"""
+        return ",".join(value.isoformat(timespec="microseconds")
+                        if type(value) is datetime else
+                        repr(value) if type(value) is float else str(value)
+                        for value in self.key(obj))
+
+    def values(self, cls, after):
+        """returns the values the cursor after stands for"""
+        if not after:
+            return None
+        if "," in after:
+            parts = after.split(",", len(self.fields) - 1)
+            if len(parts) != len(self.fields):
+                raise BadRequest(description="Invalid cursor")
+            try:
+                return tuple(parse(part)
+                             for parse, part in zip(self.parsers, parts))
+            except ValueError:
+                raise BadRequest(description="Invalid cursor")
+        obj = storage.get(cls, after)
+        if obj is None:
+            raise BadRequest(description="Invalid cursor")
+        return self.key(obj)
+
+
+PAGE_ORDER = PageOrder(("created_at", "id"),
+                       lambda obj: (obj.created_at, obj.id),
+                       (parse_time, str))
+
+
+def text_order(text):
+    """returns the order of the results of storage.search() for text"""
+    return PageOrder(("score", "id"),
+                     lambda obj: (storage.relevance(obj, text), obj.id),
+                     (float, str))
+
+
+def page_args():
+    """returns the limit and after of the request, both None if absent"""
+    limit = request.args.get("limit")
+    after = request.args.get("after")
+    if limit is None and after is None:
+        return None, None
+    try:
+        limit = MAX_LIMIT if limit is None else int(limit)
+    except ValueError:
+        raise BadRequest(description="Invalid limit")
+    if limit < 1:
+        raise BadRequest(description="Invalid limit")
+    return min(limit, MAX_LIMIT), after
+
+
+def stream_list(objs, to_dict, ndjson=False):
+    """yields the JSON array (or NDJSON lines) of objs in chunks"""
+    dumps = current_app.json.dumps
+    chunk = [] if ndjson else ["["]
+    size = 0
+    for i, obj in enumerate(objs):
+        item = dumps(to_dict(obj))
+        if ndjson:
+            item += "\n"
+        elif i:
+            item = ",\n" + item
+        chunk.append(item)
+        size += len(item)
+        if size >= CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if not ndjson:
+        chunk.append("]\n")
+    yield "".join(chunk)
+
+
+def page_response(objs, limit, more, to_dict=None, order=PAGE_ORDER):
+    """returns the streamed response of a page of objs, linking the next"""
+    to_dict = to_dict or (lambda obj: obj.to_dict())
+    ndjson = request.accept_mimetypes.best_match(
+        ["application/json", NDJSON]) == NDJSON
+    response = Response(stream_with_context(stream_list(objs, to_dict,
+                                                        ndjson)),
+                        mimetype=NDJSON if ndjson else "application/json")
+    if more and objs:
+        next_cursor = order.cursor(objs[-1])
+        args = request.args.to_dict()
+        args.update(limit=limit, after=next_cursor)
+        response.headers["Link"] = '<{}?{}>; rel="next"'.format(
+            request.base_url, urlencode(args))
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def read_pages(find, order, size=None):
+    """yields the objects find reads in order, size (MAX_LIMIT) at a time"""
+    size = size or MAX_LIMIT
+    after = None
+    while True:
+        objs = find(order_by=order.fields, after=after, limit=size)
+        yield from objs
+        if len(objs) < size:
+            return
+        after = order.key(objs[-1])
+
+
+def paginate(cls, filter_by=None, to_dict=None, find=None,
+             order=PAGE_ORDER):
+    """returns the response listing the objects of cls that match filter_by
+
+    The page is read by storage.find(), or find if given: a function taking
+    the order_by, after and limit keywords of storage.find(). Either way
+    the work done is bounded by the limit rather than by the number of
+    objects stored. Without a limit, storage.find() is read by read_pages()
+    so that only a page is held at a time; find is called once, as searches
+    rank every match whatever the page.
+    """
+    limit, after = page_args()
+    if find is None:
+        def find(**kwargs):
+            """reads the objects of cls matching filter_by"""
+            return storage.find(cls, filter_by=filter_by, **kwargs)
+        if limit is None:
+            return page_response(read_pages(find, order), None, False,
+                                 to_dict)
+    if limit is None:
+        return page_response(find(), None, False, to_dict)
+    objs = find(order_by=order.fields, after=order.values(cls, after),
+                limit=limit + 1)
+    return page_response(objs[:limit], limit, len(objs) > limit, to_dict,
+                         order)
+
+
+def paginate_objects(cls, objs, to_dict=None, order=PAGE_ORDER):
+    """returns the response listing objs, already loaded, a page at a time"""
+    limit, after = page_args()
+    if limit is None:
+        return page_response(objs, None, False, to_dict)
+    objs = sorted(objs, key=lambda obj: sort_key(order.key(obj)))
+    after = order.values(cls, after)
+    if after is not None:
+        after = sort_key(after)
+        objs = [obj for obj in objs if sort_key(order.key(obj)) > after]
+    return page_response(objs[:limit], limit, len(objs) > limit, to_dict,
+                         order)
@@ -1,15 +1,24 @@
 #!/usr/bin/python3
 """Defines the views of handling places in the API"""
 from api.v1.views import app_views
+from api.v1.views.pagination import PAGE_ORDER, PageOrder, paginate, \
+    text_order
 from flask import make_response, request, jsonify
-from models import storage, storage_t
+from models import storage
+from models.engine.geo import check_bbox, check_near, distance
+from models.engine.text import check_text
 from models.place import Place
 from models.city import City
 from models.user import User
 from werkzeug.exceptions import MethodNotAllowed, BadRequest, NotFound
 
+# the Place fields places_search can filter by range and sort on
+RANGE_FIELDS = ("price_by_night", "number_rooms", "number_bathrooms",
+                "max_guest")
+RANGE_OPERATORS = ("<", "<=", ">", ">=", "==")
 
-@app_views.route("/cities/city_id/places", methods=['GET', 'POST'])
+
+@app_views.route("/cities/<city_id>/places", methods=['GET', 'POST'])
 @app_views.route("/places/<place_id>", methods=['GET', 'DELETE', 'PUT'])
 def place_handler(city_id=None, place_id=None):
     """Handler function for the places endpoint"""
@@ -30,9 +39,7 @@ def getPlaces(city_id=None, place_id=None):
     if city_id:
         city_objs = storage.get(City, city_id)
         if city_objs:
-            place_list = list(city_objs.places)
-            place_dict = list(map(lambda x: x.to_dict(), place_list))
-            return make_response(jsonify(place_dict), 200)
+            return paginate(Place, filter_by={"city_id": city_id})
         raise NotFound()
     elif place_id:
         place_objs = storage.get(Place, place_id)
@@ -96,91 +103,97 @@ def postPlaces_Search():
     reqdata = request.get_json()
     if type(reqdata) is not dict:
         raise BadRequest(description="Not a JSON")
-    places_objs = storage.all(Place).values()
-    places = []
-    places_id = []
-    data_stat = (
-            all([
-                "states" in reqdata and type(reqdata["states"]) is list,
-                "states" in reqdata and len(reqdata["states"])
-            ]),
-            all([
-                "cities" in reqdata and type(reqdata["cities"]) is list,
-                "cities" in reqdata and len(reqdata["cities"])
-            ]),
-            all([
-                "amenities" in reqdata and type(reqdata["amenities"]) is list,
-                "amenities" in reqdata and len(reqdata["amenities"])
-            ])
-    )
-    if data_stat[0]:
-        for state_id in reqdata["states"]:
-            if not state_id:
-                continue
-            state_objs = storage.get(State, state_id)
-            if not state_objs:
-                continue
-            for city_objs in state_objs.cities:
-                filt_places = []
-                if storage_t == 'db':
-                    filt_places = list(
-                            filter(lambda x: x.id not in places_id,
-                                   city_objs.places)
-                    )
-                else:
-                    filt_places = []
-                    for place in places_objs:
-                        if place.id in places_id:
-                            continue
-                        if place.city_id == city_objs.id:
-                            filt_places.append(place)
-                places.extend(filt_places)
-                places_id.extend(list(map(lambda x: x.id, filt_places)))
-    if data_stat[1]:
-        for city_id in reqdata["cities"]:
-            if not city_id:
-                continue
-            city_objs = storage.get(City, city_id)
-            if city_objs:
-                filt_places = []
-                if storage_t == 'db':
-                    filt_places = list(
-                            filter(lambda x: x.id not in places_id,
-                                   city_objs.places)
-                    )
-                else:
-                    filt_places = []
-                    for place in places_objs:
-                        if place.id in places_id:
-                            continue
-                        if place.city_id == city_objs.id:
-                            filt_places.append(place)
-                places.extend(filt_places)
-    del places_id
-    if all([not data_stat[0], not data_stat[1]]) or not reqdata:
-        places = places_objs
-    if data_stat[2]:
-        amenity_ids = []
-        for amenity_id in reqdata["amenities"]:
-            if not amenity_id:
-                continue
-            amenity_objs = storage.get(Amenity, amenity_id)
-            if amenity_objs and amenity.id not in amenity_ids:
-                amenity_ids.append(amenity_objs.id)
-        del_places = []
-        for place in places:
-            place_amenities_ids = list(map(lambda x: x.id, place.amenities))
-            if not amenity_ids:
-                continue
-            for amenity_id in amenity_ids:
-                if amenity_id not in place_amenities_ids:
-                    del_places.append(place.id)
-                    break
-        places = list(filter(lambda x: x.id not in del_places, places))
-    places_data = []
-    for place in places:
+
+    def ids(name):
+        """returns the ids listed under name in the request"""
+        values = reqdata.get(name)
+        if type(values) is not list:
+            return []
+        return [value for value in values if value and type(value) is str]
+
+    bbox = near = None
+    try:
+        if reqdata.get("bbox") is not None:
+            bbox = check_bbox(reqdata["bbox"])
+        if reqdata.get("near") is not None:
+            near = check_near([reqdata["near"][field] for field
+                               in ("latitude", "longitude", "radius")])
+    except (KeyError, TypeError, ValueError):
+        raise BadRequest(description="Invalid bbox or near")
+    where = range_filters(reqdata.get("filters"))
+    text = reqdata.get("q")
+    if text is not None:
+        try:
+            check_text(text)
+        except ValueError:
+            raise BadRequest(description="Invalid q")
+    order = PAGE_ORDER
+    sort = reqdata.get("order_by")
+    if sort is not None:
+        if type(sort) is not str or sort.lstrip("-") not in RANGE_FIELDS \
+                or near is not None:
+            raise BadRequest(description="Invalid order_by")
+        direction = "-" if sort.startswith("-") else ""
+        order = PageOrder((sort, direction + "id"),
+                          lambda place: (getattr(place, sort.lstrip("-")),
+                                         place.id), (number, str))
+    if near is not None:
+        def km(place):
+            """returns the distance from the point searched to place"""
+            return distance(near[0], near[1], place.latitude,
+                            place.longitude)
+        order = PageOrder(("distance", "id"),
+                          lambda place: (km(place), place.id), (float, str))
+    ranked = text is not None and sort is None and near is None
+    if ranked:
+        order = text_order(text)
+
+    def search(order_by=None, **kwargs):
+        """runs the search of the request on the storage engine"""
+        order_by = None if near is not None or ranked else order.fields
+        return storage.search_places(states=ids("states"),
+                                     cities=ids("cities"),
+                                     amenities=ids("amenities"),
+                                     amenities_any=ids("amenities_any"),
+                                     bbox=bbox, near=near, where=where,
+                                     text=text, order_by=order_by,
+                                     **kwargs)
+
+    def to_dict(place):
+        """returns the dictionary of place, without its amenities"""
         place_dict = place.to_dict()
         if "amenities" in place_dict:
             del place_dict["amenities"]
-        places_data.append(place_dict)
-    return make_response(jsonify(places_data))
+        if near is not None:
+            place_dict["distance"] = km(place)
+        return place_dict
+    return paginate(Place, to_dict=to_dict, find=search, order=order)
+
+
+def number(text):
+    """returns the int or float written in text"""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def range_filters(filters):
+    """returns the where conditions of the filters of places_search
+
+    filters maps fields of RANGE_FIELDS to {operator: number}, e.g.
+    {"number_rooms": {">=": 2}, "price_by_night": {"<": 150}}.
+    """
+    if filters is None:
+        return []
+    if type(filters) is not dict:
+        raise BadRequest(description="Invalid filters")
+    where = []
+    for field, conditions in filters.items():
+        if field not in RANGE_FIELDS or type(conditions) is not dict:
+            raise BadRequest(description="Invalid filters")
+        for op, value in conditions.items():
+            if op not in RANGE_OPERATORS or type(value) not in (int, float):
+                raise BadRequest(description="Invalid filters")
+            where.append((field, op, value))
+    return where
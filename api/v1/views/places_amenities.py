@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Defines the views of handling place_amenities in the API"""
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate_objects
 from flask import make_response, request, jsonify
 from models import storage, storage_t
 from models.amenity import Amenity
@@ -8,7 +9,7 @@ from models.place import Place
 from werkzeug.exceptions import MethodNotAllowed, BadRequest, NotFound
 
 
-@app_views.route("/places/place_id/amenities", methods=['GET'])
+@app_views.route("/places/<place_id>/amenities", methods=['GET'])
 @app_views.route("/places/<place_id>/amenities/<amenity_id>",
                  methods=['DELETE', 'POST'])
 def places_amenities_handler(place_id=None, amenity_id=None):
@@ -29,9 +30,7 @@ def getPlaces_Amenities(place_id=None, amenity_id=None):
     if place_id:
         place_objs = storage.get(Place, place_id)
         if place_objs:
-            amenities_list = list(map(lambda x: x.to_dict(),
-                                      place_objs.amenities))
-            return make_response(jsonify(amenities_list))
+            return paginate_objects(Amenity, place_objs.amenities)
     raise NotFound()
 
 
@@ -50,17 +49,19 @@ def deletePlaces_Amenities(place_id=None, amenity_id=None):
         if storage_t == 'db':
             amenity_link_place = list(
                     filter(lambda x: x.id == place_id,
-                           amenity_objs.place_amenites)
+                           amenity_objs.place_amenities)
             )
             if not amenity_link_place:
                 raise NotFound()
-            place_objs.amenities.remove(amenity_objs)
-            place_objs.save()
+            with storage.transaction():
+                place_objs.amenities.remove(amenity_objs)
+                place_objs.save()
             return make_response(jsonify({}), 200)
         else:
-            amenity_idx = place_objs.amenity_ids.index(amenity_id)
-            place_objs.amenity_ids.pop(amenity_idx)
-            place_objs.save()
+            with storage.transaction():
+                place_objs.amenity_ids = [id for id in place_objs.amenity_ids
+                                          if id != amenity_id]
+                place_objs.save()
             return make_response(jsonify({}), 200)
     raise NotFound()
 
@@ -78,21 +79,23 @@ def postPlaces_Amenities(place_id=None, amenity_id=None):
             )
             amenity_link_place = list(
                     filter(lambda x: x.id == place_id,
-                           amenity_objs.place_amenites)
+                           amenity_objs.place_amenities)
             )
             if amenity_link_place and place_link_amenity:
                 amenity_dict = amenity_objs.to_dict()
                 del amenity_dict['place_amenities']
                 return make_response(jsonify(amenity_dict), 200)
-            place_objs.amenities.append(amenity_objs)
-            place_objs.save()
+            with storage.transaction():
+                place_objs.amenities.append(amenity_objs)
+                place_objs.save()
             amenity_dict = amenity_objs.to_dict()
             del amenity_dict['place_amenities']
             return make_response(jsonify(amenity_dict), 201)
         else:
             if amenity_id in place_objs.amenity_ids:
                 return make_response(jsonify(amenity_objs.to_dict()), 200)
-            place_objs.amenity_ids.push(amenity_id)
-            place_objs.save()
+            with storage.transaction():
+                place_objs.amenity_ids = place_objs.amenity_ids + [amenity_id]
+                place_objs.save()
             return make_response(jsonify(amenity_objs.to_dict()), 201)
     raise NotFound()
@@ -1,15 +1,17 @@
 #!/usr/bin/python3
 """Defines the views of handling reviews in the API"""
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate, text_order
 from flask import make_response, request, jsonify
 from models import storage
+from models.engine.text import check_text
 from models.review import Review
 from models.place import Place
 from models.user import User
 from werkzeug.exceptions import MethodNotAllowed, BadRequest, NotFound
 
 
-@app_views.route("/places/place_id/reviews", methods=['GET', 'POST'])
+@app_views.route("/places/<place_id>/reviews", methods=['GET', 'POST'])
 @app_views.route("/reviews/<review_id>", methods=['GET', 'DELETE', 'PUT'])
 def review_handler(place_id=None, review_id=None):
     """Handler function for the reviews endpoint"""
@@ -30,8 +32,7 @@ def getReviews(place_id=None, review_id=None):
     if place_id:
         place_objs = storage.get(Place, place_id)
         if place_objs:
-            reveiw_dict = [review.to_dict() for review in place_objs.reviews]
-            return make_response(jsonify(review_dict))
+            return paginate(Review, filter_by={"place_id": place_id})
         raise NotFound()
     elif review_id:
         review_objs = storage.get(Review, review_id)
@@ -86,3 +87,26 @@ def putReviews(place_id=None, review_id=None):
         review_objs.save()
         return make_response(jsonify(review_objs.to_dict()), 200)
     raise NotFound()
+
+
+@app_views.route("/reviews_search", methods=['POST'])
+def postReviews_Search():
+    """Searches the text of reviews, of some places or all, best first"""
+    reqdata = request.get_json()
+    if type(reqdata) is not dict:
+        raise BadRequest(description="Not a JSON")
+    text = reqdata.get("q")
+    try:
+        check_text(text)
+    except ValueError:
+        raise BadRequest(description="Invalid q")
+    where = []
+    places = reqdata.get("places")
+    if type(places) is list and places:
+        where.append(("place_id", "in", [place for place in places
+                                         if type(place) is str]))
+
+    def search(order_by=None, **kwargs):
+        """runs the search of the request on the storage engine"""
+        return storage.search(Review, text, where=where, **kwargs)
+    return paginate(Review, find=search, order=text_order(text))
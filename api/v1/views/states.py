@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Defines the views of handling states in the API"""
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 from flask import jsonify, make_response, request
 from models import storage
 from models.state import State
@@ -25,23 +26,28 @@ def state_handler(state_id=None):
 
 def getStates(state_id=None):
     """Gets and retrieves all states or a state based on ID"""
-    state_objs = storage.all(State).values()
     if state_id:
-        state_list = list(filter(lambda x: x.id == state_id, state_objs))
-        if state_list:
-            return make_response(jsonify(state_list[0].to_dict()), 200)
+        state_obj = storage.get(State, state_id)
+        if state_obj:
+            return make_response(jsonify(state_obj.to_dict()), 200)
         raise NotFound()
-    state_objs = list(map(lambda x: x.to_dict(), state_objs))
-    return make_response(jsonify(state_objs))
+    return paginate(State)
 
 
 def deleteStates(state_id=None):
-    """Delete a state object based on ID"""
-    state_objs = storage.all(State).values()
-    state_list = list(filter(lambda x: x.id == state_id, state_objs))
-    if state_list:
-        storage.delete(state_list[0])
-        storage.save()
+    """Delete a state object, with its cities and their places, based on ID"""
+    state_objs = storage.find(State, filter_by={"id": state_id},
+                              load=["cities.places.reviews"])
+    if state_objs:
+        with storage.transaction():
+            for city in state_objs[0].cities:
+                for place in city.places:
+                    for review in place.reviews:
+                        storage.delete(review)
+                    storage.delete(place)
+                storage.delete(city)
+            storage.delete(state_objs[0])
+            storage.save()
         return make_response(jsonify({}), 200)
     raise NotFound()
 
@@ -61,13 +67,11 @@ def postStates(state_id=None):
 def putStates(state_id=None):
     """Puts or updates a state based on ID"""
     immut_attrs = ("id", "created_at", "updated_at")
-    state_objs = storage.all(State).values()
-    state_list = list(filter(lambda x: x.id == state_id, state_objs))
-    if state_list:
+    prev_state = storage.get(State, state_id)
+    if prev_state:
         state_data = request.get_json()
         if type(state_data) is not dict:
             raise BadRequest(description="Not a JSON")
-        prev_state = state_list[0]
         for key, value in state_data.items():
             if key not in immut_attrs:
                 setattr(prev_state, key, value)
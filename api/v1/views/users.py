@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Defines the views of handling users in the API"""
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 from flask import make_response, request, jsonify
 from models import storage
 from models.user import User
@@ -25,22 +26,19 @@ def user_handler(user_id=None):
 
 def getUsers(user_id=None):
     """Gets and retrieves all users or a user based on ID"""
-    user_objs = storage.all(User).values()
     if user_id:
-        user_list = list(filter(lambda x: x.id == user_id, user_objs))
-        if user_list:
-            return make_response(jsonify(user_list[0].to_dict()))
+        user_obj = storage.get(User, user_id)
+        if user_obj:
+            return make_response(jsonify(user_obj.to_dict()))
         raise NotFound()
-    user_objs = list(map(lambda x: x.to_dict(), user_objs))
-    return make_response(jsonify(user_objs))
+    return paginate(User)
 
 
 def deleteUsers(user_id=None):
     """Delete a user object based on ID"""
-    user_objs = storage.all(User).values()
-    user_list = list(filter(lambda x: x.id == user_id, user_objs))
-    if user_list:
-        storage.delete(user_list[0])
+    user_obj = storage.get(User, user_id)
+    if user_obj:
+        storage.delete(user_obj)
         storage.save()
         return make_response(jsonify({}), 200)
     raise NotFound()
@@ -63,13 +61,11 @@ def postUsers(user_id=None):
 def putUsers(user_id=None):
     """Puts or updates a user based on ID"""
     immut_attrs = ("id", "email", "created_at", "updated_at")
-    user_objs = storage.all(User).values()
-    user_list = list(filter(lambda x: x.id == user_id, user_objs))
-    if user_list:
+    prev_user = storage.get(User, user_id)
+    if prev_user:
         user_data = request.get_json()
         if type(user_data) is not dict:
             raise BadRequest(description="Not a JSON")
-        prev_user = user_list[0]
         for key, value in user_data.items():
             if key not in immut_attrs:
                 setattr(prev_user, key, value)
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""
+Measures FileStorage reload() and save() with each installed JSON codec
+
+usage: ./benchmarks/file_storage_codec.py [objects]
+"""
+from datetime import datetime
+import os
+import sys
+import tempfile
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.base_model import parse_time, time  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.json_codec import codecs  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def timed(func):
+    """returns the seconds taken by a call to func"""
+    start = default_timer()
+    func()
+    return default_timer() - start
+
+
+if __name__ == "__main__":
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    folder = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(folder, "file.json")
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__codec = codecs["json"]
+    storage = FileStorage()
+    for i in range(objects):
+        storage.new(Place(name="Place {}".format(i), city_id="c", user_id="u",
+                          number_rooms=i % 5, price_by_night=i % 300))
+    storage.compact()
+    size = os.path.getsize(FileStorage._FileStorage__file_path)
+    print("{} objects, {:.1f} MiB".format(objects, size / 1024 / 1024))
+    for name, codec in sorted(codecs.items()):
+        FileStorage._FileStorage__codec = codec
+        FileStorage._FileStorage__objects = {}
+        load = timed(lambda: storage.reload(force=True))
+        save = timed(storage.compact)
+        print("{:7s} reload {:7.3f} s  save {:7.3f} s".format(
+            name, load, save))
+    stamp = datetime.now().strftime(time)
+    slow = timed(lambda: [datetime.strptime(stamp, time)
+                          for i in range(objects * 2)])
+    fast = timed(lambda: [parse_time(stamp) for i in range(objects * 2)])
+    print("timestamps strptime {:.3f} s  fromisoformat {:.3f} s".format(
+        slow, fast))
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+    os.rmdir(folder)
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""
+Measures the cost of each FileStorage durability level (HBNB_FS_FSYNC)
+
+usage: ./benchmarks/file_storage_fsync.py [objects] [saves]
+"""
+import os
+import sys
+import tempfile
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.state import State  # noqa: E402
+
+
+def bench(level, mode, objects, saves):
+    """returns the mean seconds per save() for a level and write mode"""
+    folder = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(folder, "file.json")
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__fsync = level
+    FileStorage._FileStorage__mode = mode
+    storage = FileStorage()
+    for i in range(objects):
+        storage.new(State(name="State {}".format(i)))
+    storage.compact()
+    obj = State(name="Changed")
+    start = default_timer()
+    for i in range(saves):
+        obj.name = "Changed {}".format(i)
+        storage.new(obj)
+        storage.save()
+    elapsed = default_timer() - start
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+    os.rmdir(folder)
+    return elapsed / saves
+
+
+if __name__ == "__main__":
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print("{} objects, {} saves".format(objects, saves))
+    for mode in ("snapshot", "journal"):
+        for level in ("none", "file", "dir"):
+            ms = bench(level, mode, objects, saves) * 1000
+            print("{:9s} fsync={:5s} {:9.3f} ms/save".format(mode, level, ms))
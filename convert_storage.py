@@ -0,0 +1,16 @@
+#!/usr/bin/python3
+"""
+Converts the FileStorage file between the JSON and binary formats
+
+usage: ./convert_storage.py to-binary|to-json SRC DST
+"""
+import sys
+from models.engine.binary_snapshot import binary_to_json, json_to_binary
+
+converters = {"to-binary": json_to_binary, "to-json": binary_to_json}
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in converters:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    converters[sys.argv[1]](sys.argv[2], sys.argv[3])
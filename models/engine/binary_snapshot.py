@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+"""
+Contains the binary snapshot format FileStorage can map into memory
+
+A snapshot is laid out as:
+    header   magic (8 bytes) and the offset of the class table (u64)
+    records  the JSON encoding of every object, back to back
+    indexes  for each class, the ids of its objects back to back, then its
+             entries sorted by id: the id offset (u64) and length (u32),
+             the record offset (u64) and length (u32)
+    table    the number of classes (u32), then for each class its name
+             length (u16), name, index offset (u64) and entry count (u32)
+All integers are little-endian.
+"""
+
+from collections.abc import MutableMapping
+import mmap
+import struct
+from models.engine.json_codec import get_codec, iter_items
+
+MAGIC = b"HBNBSNP2"
+HEADER = struct.Struct("<8sQ")
+ENTRY = struct.Struct("<QIQI")
+COUNT = struct.Struct("<I")
+NAME = struct.Struct("<H")
+CLASS = struct.Struct("<QI")
+
+
+def is_snapshot(path):
+    """tells if the file at path is a binary snapshot"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class SnapshotWriter:
+    """writes records to a binary snapshot one at a time"""
+
+    def __init__(self, f, codec=None):
+        """Instantiate a writer on the binary file object f"""
+        self.f = f
+        self.codec = codec or get_codec()
+        self.entries = {}
+        self.start = f.tell()
+        f.write(HEADER.pack(MAGIC, 0))
+
+    def add(self, key, data):
+        """appends the record data stored under key <class name>.id"""
+        name, _, id = key.partition(".")
+        id = id.encode("utf-8")
+        blob = self.codec.dumps(data)
+        self.entries.setdefault(name, []).append(
+            (id, self.f.tell() - self.start, len(blob)))
+        self.f.write(blob)
+
+    def close(self):
+        """writes the indexes and class table and patches the header"""
+        table = []
+        for name, entries in sorted(self.entries.items()):
+            entries.sort()
+            ids = self.f.tell() - self.start
+            self.f.write(b"".join(entry[0] for entry in entries))
+            table.append((name, self.f.tell() - self.start, len(entries)))
+            for id, offset, length in entries:
+                self.f.write(ENTRY.pack(ids, len(id), offset, length))
+                ids += len(id)
+        table_offset = self.f.tell() - self.start
+        self.f.write(COUNT.pack(len(table)))
+        for name, offset, count in table:
+            name = name.encode("utf-8")
+            self.f.write(NAME.pack(len(name)) + name +
+                         CLASS.pack(offset, count))
+        end = self.f.tell()
+        self.f.seek(self.start)
+        self.f.write(HEADER.pack(MAGIC, table_offset))
+        self.f.seek(end)
+
+
+def dump(records, f, codec=None):
+    """writes the mapping <class name>.id -> dict as a snapshot to f"""
+    writer = SnapshotWriter(f, codec)
+    for key, data in records.items():
+        writer.add(key, data)
+    writer.close()
+
+
+class Snapshot:
+    """a binary snapshot mapped read-only into memory"""
+
+    def __init__(self, path, codec=None):
+        """Instantiate a Snapshot by mapping the file at path"""
+        self.codec = codec or get_codec()
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not a binary snapshot".format(path))
+        self.classes = {}
+        count, = COUNT.unpack_from(self.map, offset)
+        offset += COUNT.size
+        for i in range(count):
+            size, = NAME.unpack_from(self.map, offset)
+            offset += NAME.size
+            name = self.map[offset:offset + size].decode("utf-8")
+            offset += size
+            self.classes[name] = CLASS.unpack_from(self.map, offset)
+            offset += CLASS.size
+
+    def entry(self, name, i):
+        """returns the (id, offset, length) of entry i of class name"""
+        index, count = self.classes[name]
+        id, size, offset, length = ENTRY.unpack_from(self.map,
+                                                     index + i * ENTRY.size)
+        return self.map[id:id + size], offset, length
+
+    def find(self, name, id):
+        """returns the position of id in the index of class name, or -1"""
+        if name not in self.classes:
+            return -1
+        id = id.encode("utf-8")
+        count = self.classes[name][1]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entry(name, mid)[0] < id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < count and self.entry(name, lo)[0] == id:
+            return lo
+        return -1
+
+    def record(self, name, i):
+        """decodes the record of entry i of class name"""
+        id, offset, length = self.entry(name, i)
+        return self.codec.loads(self.map[offset:offset + length])
+
+    def items(self, name=None):
+        """yields the (<class name>.id, dict) records of one or all classes"""
+        for name in ([name] if name is not None else sorted(self.classes)):
+            for i in range(self.classes.get(name, (0, 0))[1]):
+                id = self.entry(name, i)[0].decode("utf-8")
+                yield name + "." + id, self.record(name, i)
+
+    def section(self, name):
+        """returns a mutable mapping over the records of class name"""
+        return SnapshotSection(self, name)
+
+
+class SnapshotSection(MutableMapping):
+    """the records of one class of a Snapshot, by <class name>.id
+
+    Records decode on access. Keys set or deleted are kept in memory and
+    shadow the snapshot, which is never written to.
+    """
+
+    def __init__(self, snapshot, name):
+        """Instantiate the section of class name of snapshot"""
+        self.snapshot = snapshot
+        self.name = name
+        self.overlay = {}
+        self.hidden = set()
+
+    def __position(self, key):
+        """returns the position of key in the snapshot, or -1"""
+        name, _, id = key.partition(".")
+        if name != self.name or key in self.hidden:
+            return -1
+        return self.snapshot.find(name, id)
+
+    def __getitem__(self, key):
+        """returns the record stored under key"""
+        if key in self.overlay:
+            return self.overlay[key]
+        i = self.__position(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.snapshot.record(self.name, i)
+
+    def __contains__(self, key):
+        """tells if a record is stored under key, without decoding it"""
+        return key in self.overlay or self.__position(key) >= 0
+
+    def __setitem__(self, key, data):
+        """stores data under key, shadowing the snapshot"""
+        if key not in self.overlay and self.__position(key) >= 0:
+            self.hidden.add(key)
+        self.overlay[key] = data
+
+    def __delitem__(self, key):
+        """removes the record stored under key"""
+        if key in self.overlay:
+            del self.overlay[key]
+        elif self.__position(key) >= 0:
+            self.hidden.add(key)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        """yields the keys of the section"""
+        yield from self.overlay
+        count = self.snapshot.classes.get(self.name, (0, 0))[1]
+        for i in range(count):
+            key = self.name + "." + self.snapshot.entry(
+                self.name, i)[0].decode("utf-8")
+            if key not in self.hidden:
+                yield key
+
+    def __len__(self):
+        """returns the number of records in the section"""
+        count = self.snapshot.classes.get(self.name, (0, 0))[1]
+        return len(self.overlay) + count - len(self.hidden)
+
+
+def json_to_binary(src, dst, codec=None):
+    """converts the JSON file src to the binary snapshot dst"""
+    with open(src, 'r', encoding="utf-8") as f_in, open(dst, 'wb') as f_out:
+        writer = SnapshotWriter(f_out, codec)
+        for key, data in iter_items(f_in):
+            writer.add(key, data)
+        writer.close()
+
+
+def binary_to_json(src, dst, codec=None):
+    """converts the binary snapshot src to the JSON file dst"""
+    snapshot = Snapshot(src, codec)
+    with open(dst, 'wb') as f:
+        f.write(b"{")
+        for i, (key, data) in enumerate(snapshot.items()):
+            f.write((b", " if i else b"") + snapshot.codec.dumps(key) +
+                    b": " + snapshot.codec.dumps(data))
+        f.write(b"}")
+    snapshot.map.close()
@@ -3,49 +3,116 @@
 Contains the class DBStorage
 """
 
+from contextlib import contextmanager
+from datetime import datetime
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
 from models.city import City
+from models.engine.geo import bbox_around, by_distance, check_bbox, \
+    check_near
+from models.engine.query import (check_after, check_where, OPERATORS,
+                                 order_fields)
+from models.engine.pool import TimedQueuePool
+from models.engine.routing import RoutingSession
+from models.engine.text import check_text, text_field
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import and_, create_engine, func, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import joinedload, scoped_session, selectinload, \
+    sessionmaker
+from threading import local
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+# the fields bulk_update() never sets from a row
+FIXED_FIELDS = ("created_at", "updated_at", "__class__")
+loaders = {"joined": joinedload, "selectin": selectinload}
 
 
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
+    __replicas = []
     __session = None
+    # threading.local - depth of the transaction() blocks of each thread
+    __local = local()
 
-    def __init__(self):
-        """Instantiate a DBStorage object"""
+    def __init__(self, url=None, replica_urls=None):
+        """Instantiate a DBStorage object
+
+        url is that of the primary database and replica_urls those of its
+        read replicas; they default to the MySQL database of HBNB_MYSQL_HOST
+        and to the same database on each of the comma-separated
+        HBNB_MYSQL_REPLICAS hosts.
+        """
         HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
         HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
+        HBNB_MYSQL_REPLICAS = getenv('HBNB_MYSQL_REPLICAS', '')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        mysql_url = 'mysql+mysqldb://{}:{}@{}/{}'
+        if url is None:
+            url = mysql_url.format(HBNB_MYSQL_USER, HBNB_MYSQL_PWD,
+                                   HBNB_MYSQL_HOST, HBNB_MYSQL_DB)
+        if replica_urls is None:
+            replica_urls = [mysql_url.format(HBNB_MYSQL_USER, HBNB_MYSQL_PWD,
+                                             host.strip(), HBNB_MYSQL_DB)
+                            for host in HBNB_MYSQL_REPLICAS.split(',')
+                            if host.strip()]
+        self.__engine = create_engine(url, **self.__pool_args())
+        self.__replicas = [create_engine(replica_url, **self.__pool_args())
+                           for replica_url in replica_urls]
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    @staticmethod
+    def __pool_args():
+        """returns the create_engine() arguments of the connection pool
+
+        HBNB_MYSQL_POOL_SIZE connections are kept open and up to
+        HBNB_MYSQL_MAX_OVERFLOW more are opened under load; a checkout
+        waits HBNB_MYSQL_POOL_TIMEOUT seconds for one at most. Connections
+        older than HBNB_MYSQL_POOL_RECYCLE seconds are replaced, and
+        HBNB_MYSQL_POOL_PRE_PING=1 tests each one before handing it out.
+        """
+        return {"poolclass": TimedQueuePool,
+                "pool_size": int(getenv('HBNB_MYSQL_POOL_SIZE', 5)),
+                "max_overflow": int(getenv('HBNB_MYSQL_MAX_OVERFLOW', 10)),
+                "pool_timeout": float(getenv('HBNB_MYSQL_POOL_TIMEOUT', 30)),
+                "pool_recycle": int(getenv('HBNB_MYSQL_POOL_RECYCLE', -1)),
+                "pool_pre_ping": getenv('HBNB_MYSQL_POOL_PRE_PING') == "1"}
+
+    def pool_stats(self):
+        """returns the statistics of the connection pool
+
+        Those of the pools of the replicas, if any, are listed under
+        "replicas".
+        """
+        stats = self.__engine.pool.stats()
+        if self.__replicas:
+            stats["replicas"] = [replica.pool.stats()
+                                 for replica in self.__replicas]
+        return stats
+
+    def all(self, cls=None, load=None):
+        """query on the current database session
+
+        load lists the relationships of cls to load along, see __load().
+        """
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                query = self.__session.query(classes[clss])
+                if cls is not None:
+                    query = self.__load(query, classes[clss], load)
+                objs = query.all()
                 for obj in objs:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
@@ -58,27 +125,315 @@ class DBStorage:
             obj = self.__session.query(cls).filter(cls.id == id).first()
         return obj
 
+    def find(self, cls, filter_by=None, where=None, order_by=None,
+             limit=None, offset=None, after=None, load=None):
+        """returns the objects of cls matching filter_by and where
+
+        Every condition, the ordering and the window are run in SQL, after
+        as a row comparison on the order_by columns. See
+        models/engine/query.py for where, order_by and after, and __load()
+        for load.
+        """
+        cls = classes.get(cls, cls)
+        query = self.__load(self.__session.query(cls), cls, load)
+        if filter_by:
+            query = query.filter_by(**filter_by)
+        query = self.__where(query, cls, where)
+        return self.__window(query, cls, order_by, after, limit, offset)
+
+    def search(self, cls, text, filter_by=None, where=None, after=None,
+               limit=None, offset=None, load=None):
+        """returns the objects of cls whose text holds a word of text
+
+        They come best match first, ties by id, as ranked by MySQL from
+        the FULLTEXT index of the text field of cls. filter_by, where,
+        limit, offset and load are those of find(), and after is a
+        (score, id).
+        """
+        cls = classes.get(cls, cls)
+        score = self.__score(cls, text)
+        query = self.__load(self.__session.query(cls), cls, load)
+        if filter_by:
+            query = query.filter_by(**filter_by)
+        query = self.__where(query, cls, where).filter(score > 0)
+        return self.__ranked(query, cls, score, after, limit, offset)
+
+    def relevance(self, obj, text):
+        """returns the score search() ranks obj by for text"""
+        cls = type(obj)
+        return self.__session.query(self.__score(cls, text)).filter(
+            cls.id == obj.id).scalar() or 0.0
+
+    @staticmethod
+    def __score(cls, text):
+        """returns the MATCH relevance of text on the text field of cls"""
+        check_text(text)
+        return match(getattr(cls, text_field(cls.__name__)),
+                     against=text).in_natural_language_mode()
+
+    @staticmethod
+    def __ranked(query, cls, score, after, limit, offset):
+        """returns the rows of query best score first, after, limit, offset"""
+        query = query.order_by(score.desc(), cls.id)
+        if after is not None:
+            query = query.filter(or_(score < after[0], and_(
+                score == after[0], cls.id > after[1])))
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def __load(query, cls, load):
+        """returns query loading the relationships of load along its rows
+
+        load lists relationship paths, like ["cities", "cities.places"],
+        each step loaded by one more query, whatever the number of rows:
+        the way the loading dict of its model names, else "selectin" for
+        a list and "joined" for a single object.
+        """
+        for path in load or ():
+            option = None
+            owner = cls
+            for name in path.split("."):
+                relation = sqlalchemy.inspect(owner).relationships.get(name)
+                if relation is None:
+                    raise ValueError("{} has no relationship {}".format(
+                        owner.__name__, name))
+                # a model's loading dict maps the names of its
+                # relationships to a key of loaders
+                way = getattr(owner, "loading", {}).get(
+                    name, "selectin" if relation.uselist else "joined")
+                loader = loaders[way]
+                attribute = getattr(owner, name)
+                option = loader(attribute) if option is None else \
+                    getattr(option, loader.__name__)(attribute)
+                owner = relation.mapper.class_
+            query = query.options(option)
+        return query
+
+    @staticmethod
+    def __where(query, cls, where):
+        """returns query filtered by the conditions of where on cls"""
+        for field, op, value in check_where(where):
+            column = getattr(cls, field)
+            if op == "in":
+                query = query.filter(column.in_(value))
+            else:
+                query = query.filter(OPERATORS[op](column, value))
+        return query
+
+    def __window(self, query, cls, order_by, after, limit, offset):
+        """returns the rows of query in order_by order, after, limit, offset"""
+        for field, descending in order_fields(order_by):
+            column = getattr(cls, field)
+            query = query.order_by(column.desc() if descending else column)
+        if after is not None:
+            check_after(order_by, after)
+            fields = order_fields(order_by)
+            columns = [getattr(cls, field) for field, descending in fields]
+            query = query.filter(or_(*[
+                and_(*[column == value for column, value
+                       in zip(columns[:i], after[:i])],
+                     columns[i] < after[i] if fields[i][1]
+                     else columns[i] > after[i])
+                for i in range(len(columns))]))
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def search_places(self, states=None, cities=None, amenities=None,
+                      order_by=None, after=None, limit=None, offset=None,
+                      amenities_any=None, bbox=None, near=None, where=None,
+                      text=None, load=None):
+        """returns the places in states or cities that have every amenity
+
+        One query: the cities of states and the places having all the
+        amenities are IN subqueries, the latter over place_amenity grouped
+        by place. amenities_any keeps the places having at least one of
+        its amenities, bbox and near those in an area, as ranges on the
+        indexed (latitude, longitude) of places, and text those described
+        with one of its words, from a FULLTEXT index. Unknown ids are
+        ignored; no states nor cities means every place. where, order_by,
+        after, limit and offset are those of find(), except that places
+        near a point come nearest first, after being a (distance, id), and
+        that without order_by places matching text come as from search().
+        load is that of find().
+        """
+        if near is not None and order_by is not None:
+            raise ValueError("places near a point are ordered by distance")
+        query = self.__where(self.__load(self.__session.query(Place), Place,
+                                         load), Place, where)
+        if bbox is not None:
+            query = query.filter(self.__in_bbox(check_bbox(bbox)))
+        if near is not None:
+            near = check_near(near)
+            query = query.filter(self.__in_bbox(bbox_around(*near)))
+        score = None
+        if text is not None:
+            score = self.__score(Place, text)
+            query = query.filter(score > 0)
+        located = []
+        if states:
+            located.append(Place.city_id.in_(
+                sqlalchemy.select(City.id).where(City.state_id.in_(states))))
+        if cities:
+            located.append(Place.city_id.in_(cities))
+        if located:
+            query = query.filter(or_(*located))
+        place_amenity = Base.metadata.tables["place_amenity"]
+        amenity_ids = [id for id, in self.__session.query(Amenity.id).filter(
+            Amenity.id.in_(set(amenities or ())))]
+        if amenity_ids:
+            query = query.filter(Place.id.in_(
+                sqlalchemy.select(place_amenity.c.place_id)
+                .where(place_amenity.c.amenity_id.in_(amenity_ids))
+                .group_by(place_amenity.c.place_id)
+                .having(func.count() == len(amenity_ids))))
+        some = [id for id, in self.__session.query(Amenity.id).filter(
+            Amenity.id.in_(set(amenities_any or ())))]
+        if some:
+            query = query.filter(Place.id.in_(
+                sqlalchemy.select(place_amenity.c.place_id)
+                .where(place_amenity.c.amenity_id.in_(some))))
+        if near is not None:
+            places = [place for km, place in by_distance(query.all(), near,
+                                                         after)]
+            start = offset or 0
+            if limit is not None:
+                return places[start:start + limit]
+            return places[start:]
+        if score is not None and order_by is None:
+            return self.__ranked(query, Place, score, after, limit, offset)
+        return self.__window(query, Place, order_by, after, limit, offset)
+
+    @staticmethod
+    def __in_bbox(bbox):
+        """returns the condition of a place lying in bbox"""
+        south, west, north, east = bbox
+        if west <= east:
+            longitude = Place.longitude.between(west, east)
+        else:
+            longitude = or_(Place.longitude >= west, Place.longitude <= east)
+        return and_(Place.latitude.between(south, north), longitude)
+
     def count(self, cls=None):
         """count the number of objects in storage based on the class"""
-        return len(self.all(cls))
+        if cls is None:
+            return sum(self.counts().values())
+        cls = classes.get(cls, cls)
+        if cls not in classes.values():
+            return 0
+        return self.__session.query(func.count(cls.id)).scalar()
+
+    def counts(self):
+        """returns the number of objects of every class in one query"""
+        names = sorted(classes)
+        row = self.__session.query(*[
+            self.__session.query(func.count(classes[name].id))
+            .scalar_subquery() for name in names]).one()
+        return dict(zip(names, row))
 
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
 
+    def bulk_new(self, objs):
+        """adds objs to the session and commits, inserting them in batches
+
+        SQLAlchemy groups the INSERTs of a flush by table into multi-row
+        statements, so objs keep their relationships and stay in the
+        session without one round trip per object.
+        """
+        self.__session.add_all(objs)
+        self.save()
+
+    def bulk_update(self, cls, rows):
+        """sets the fields of the dicts of rows on the rows of cls
+
+        Each row holds the id of its object; rows of unknown ids are
+        skipped, and id, created_at and updated_at are not set from rows.
+        The UPDATEs run as one executemany, then the objects of the session
+        are expired.
+        """
+        cls = classes.get(cls, cls)
+        rows = list(rows)
+        ids = [row["id"] for row in rows]
+        known = set()
+        for start in range(0, len(ids), 1000):
+            known.update(id for id, in self.__session.query(cls.id).filter(
+                cls.id.in_(ids[start:start + 1000])))
+        now = datetime.now()
+        mappings = [dict({field: value for field, value in row.items()
+                          if field not in FIXED_FIELDS}, updated_at=now)
+                    for row in rows if row["id"] in known]
+        if mappings:
+            self.__session.bulk_update_mappings(cls, mappings)
+        self.save()
+        self.__session.expire_all()
+
+    def bulk_delete(self, cls, ids):
+        """deletes the rows of cls of ids, 1000 per DELETE, and commits"""
+        cls = classes.get(cls, cls)
+        ids = list(ids)
+        for start in range(0, len(ids), 1000):
+            self.__session.query(cls).filter(cls.id.in_(
+                ids[start:start + 1000])).delete(synchronize_session=False)
+        self.save()
+        self.__session.expire_all()
+
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session
+
+        Inside a transaction() block the changes are only flushed.
+        """
+        if getattr(self.__local, "depth", 0):
+            self.__session.flush()
+        else:
+            self.__session.commit()
+
+    @contextmanager
+    def transaction(self):
+        """commits the changes of the block once, at its end, or none
+
+        save() only flushes inside the block, and the session is rolled
+        back if the block raises. Nested blocks join the outermost one;
+        blocks are per thread, like the session. The block reads from the
+        primary database, like a session that wrote.
+        """
+        depth = getattr(self.__local, "depth", 0)
+        self.__local.depth = depth + 1
+        if not depth:
+            self.__session().sticky = True
+        try:
+            yield self
+        except BaseException:
+            if not depth:
+                self.__session.rollback()
+            raise
+        finally:
+            self.__local.depth = depth
+        if not depth:
+            self.__session.commit()
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
             self.__session.delete(obj)
 
-    def reload(self):
-        """reloads data from the database"""
+    def reload(self, force=False):
+        """reloads data from the database
+
+        Sessions read from a replica until they write, see
+        models/engine/routing.py.
+        """
         Base.metadata.create_all(self.__engine)
-        sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False,
+                                    class_=RoutingSession,
+                                    replicas=self.__replicas)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
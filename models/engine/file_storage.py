@@ -3,17 +3,38 @@
 Contains the FileStorage class
 """
 
-import json
+from contextlib import contextmanager
+from datetime import datetime
+import os
+from os import getenv
+import tempfile
+from threading import get_ident, local
+from types import MappingProxyType
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine import binary_snapshot
+from models.engine.geo import bbox_around, by_distance, check_bbox, \
+    check_near
+from models.engine.indexes import BitmapIndex, FieldIndex, GridIndex, \
+    SortedIndex, TextIndex
+from models.engine.query import (check_after, check_where, is_after,
+                                 matches, order_fields, ranges, sort_objects)
+from models.engine.json_codec import get_codec, iter_items
+from models.engine.text import check_text, is_ranked_after, text_field
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+# the fields bulk_update() never sets from a row
+FIXED_FIELDS = ("id", "created_at", "updated_at", "__class__")
 
 
 class FileStorage:
@@ -23,61 +44,817 @@ class FileStorage:
     __file_path = "file.json"
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - <class name> -> {<class name>.id: obj}, mirrors __objects
+    __by_class = {}
+    # dictionary - the __objects dict that __by_class was built from
+    __indexed = None
+    # dictionary - <class name> -> {(index class, spec): index}: FieldIndex
+    # of a field built by lookup(), SortedIndex of a tuple of fields built
+    # by find() to read ranges in order, BitmapIndex of Place.amenity_ids,
+    # GridIndex of the Place (latitude, longitude) set, TextIndex of a text
+    # field
+    __refs = {}
+    # tuple - stamps of __file_path and its journal when last read or written
+    __stamp = None
+    # Exception - why __file_path last failed to load, None if it loaded
+    __unreadable = None
+    # string - "snapshot" rewrites __file_path on save, "journal" appends
+    __mode = getenv("HBNB_FS_MODE", "snapshot")
+    # integer - journal size in bytes past which save() compacts it
+    __journal_max = int(getenv("HBNB_FS_JOURNAL_MAX", 4 * 1024 * 1024))
+    # string - "none", "file" (fsync writes) or "dir" (also fsync the folder)
+    __fsync = getenv("HBNB_FS_FSYNC", "none")
+    # JSONCodec - encoder/decoder of the files, the standard json by default
+    __codec = get_codec(getenv("HBNB_FS_CODEC"))
+    # string - "json" or "binary", the format compact() writes the file in
+    __format = getenv("HBNB_FS_FORMAT", "json")
+    # boolean - lock the files so several processes can share them
+    __shared = getenv("HBNB_FS_SHARED") == "1"
+    # boolean - keep loaded records as dicts until they are first accessed
+    __lazy = getenv("HBNB_FS_LAZY") == "1"
+    # dictionary - <class name> -> {<class name>.id: dict} not built yet
+    __raw = {}
+    # boolean - parse the file record by record instead of all at once
+    __stream = getenv("HBNB_FS_STREAM") == "1"
+    # dictionary - <class name>.id -> obj (None once deleted) since last save
+    __dirty = {}
+    # dictionary - <class name>.id -> serialized dict of each clean object
+    __cache = {}
+    # threading.local - depth of the transaction() blocks of each thread
+    __local = local()
+    # dictionary - thread id -> {<class name>.id: saved dict (None if
+    # unsaved)} of each object changed in the open transaction of the
+    # thread, to roll it back and to keep it out of other threads' saves
+    __undo = {}
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def __index(self):
+        """returns the per-class buckets, rebuilt if __objects was replaced"""
+        if FileStorage.__indexed is not self.__objects:
+            by_class = {}
+            for key, obj in self.__objects.items():
+                by_class.setdefault(type(obj).__name__, {})[key] = obj
+            FileStorage.__by_class = by_class
+            FileStorage.__cache = {}
+            FileStorage.__refs = {}
+            FileStorage.__indexed = self.__objects
+        return self.__by_class
+
+    def __journal_path(self):
+        """returns the path of the journal that goes with __file_path"""
+        return self.__file_path + ".journal"
+
+    def __file_stamp(self):
+        """returns (mtime, size, inode) of the file and journal, or None"""
+        stamp = []
+        for path in (self.__file_path, self.__journal_path()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                stamp.append(None)
+                continue
+            stamp.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        if stamp == [None, None]:
+            return None
+        return tuple(stamp)
+
+    def __flush(self, f):
+        """flushes f and fsyncs it if the durability level asks for it"""
+        f.flush()
+        if self.__fsync in ("file", "dir"):
+            os.fsync(f.fileno())
+
+    def __sync_dir(self):
+        """fsyncs the folder of __file_path if the level asks for it"""
+        if self.__fsync != "dir":
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.__file_path)),
+                     os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __write_atomic(self, data):
+        """replaces __file_path with data in __format, never leaving it torn"""
+        folder = os.path.dirname(os.path.abspath(self.__file_path))
+        try:
+            mode = os.stat(self.__file_path).st_mode
+        except OSError:
+            mode = 0o644
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if self.__format == "binary":
+                    binary_snapshot.dump(data, f, self.__codec)
+                else:
+                    f.write(self.__codec.dumps(data))
+                self.__flush(f)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.__file_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.__sync_dir()
+
+    @staticmethod
+    def __value(spec, obj=None, data=None, defaults=True):
+        """returns what the index of spec files obj or its dict data under
+
+        A field missing from data reads the default of its class, as it
+        would on the object data builds, unless defaults is False: then a
+        field never set on obj or in data is None on both.
+        """
+        if type(spec) is tuple:
+            return tuple(FileStorage.__value(field, obj, data, defaults)
+                         for field in spec)
+        if obj is not None:
+            if not defaults:
+                return vars(obj).get(spec)
+            return getattr(obj, spec, None)
+        if spec in data or not defaults:
+            return data.get(spec)
+        return getattr(classes[data["__class__"]], spec, None)
+
+    def __reindex(self, key, obj=None, data=None):
+        """updates the find() and lookup() indexes of key from obj or data
+
+        A GridIndex files only the places whose location was set, as the
+        NULL locations of DBStorage are left out of its searches.
+        """
+        for (kind, spec), index in self.__refs.get(key.partition(".")[0],
+                                                   {}).items():
+            if obj is not None or data is not None:
+                index.add(key, self.__value(spec, obj, data,
+                                            kind is not GridIndex))
+            else:
+                index.remove(key)
+
+    def __put(self, key, obj):
+        """stores obj under key in __objects and its class bucket
+
+        A record of key not built yet is dropped, as obj replaces it.
+        """
+        records = self.__raw.get(type(obj).__name__)
+        if records and key in records:
+            del records[key]
+        self.__index().setdefault(type(obj).__name__, {})[key] = obj
+        self.__objects[key] = obj
+        self.__reindex(key, obj)
+
+    def __drop(self, key):
+        """removes key from __objects and its class bucket"""
+        self.__reindex(key)
+        obj = self.__objects.pop(key, None)
+        if obj is not None:
+            self.__index().get(type(obj).__name__, {}).pop(key, None)
+            self.__cache.pop(key, None)
+        elif self.__raw.get(key.partition(".")[0], {}).pop(key, None):
+            self.__cache.pop(key, None)
+        return obj
+
+    def __materialize(self, name=None):
+        """builds the objects of class name (all if None) left as dicts"""
+        for name in ([name] if name is not None else list(self.__raw)):
+            for key, data in self.__raw.pop(name, {}).items():
+                self.__put(key, classes[data["__class__"]](**data))
+                self.__cache.setdefault(key, data)
+
+    def __serialize(self, key, obj):
+        """returns the cached dict of obj, re-serializing it if dirty"""
+        data = self.__cache.get(key)
+        if data is None or key in self.__dirty:
+            data = obj.to_dict()
+            self.__cache[key] = data
+        return data
+
+    def all(self, cls=None, load=None):
+        """returns the dictionary __objects, or a live view of one class
+
+        load is that of DBStorage: relationships are read from the lookup()
+        indexes here, so there is nothing to load ahead.
+        """
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            name = cls if type(cls) is str else cls.__name__
+            if name in self.__raw:
+                self.__materialize(name)
+            bucket = self.__index().get(name)
+            if bucket is None:
+                return {}
+            return MappingProxyType(bucket)
+        if self.__raw:
+            self.__materialize()
         return self.__objects
 
     def get(self, cls, id):
         """retrieves an object based on the class and id"""
         if cls is not None:
-            mch_objs = [obj for obj in self.__objects.values()
-                        if type(obj) is cls and obj.id == id]
-            if mch_objs:
-                return mch_objs[0]
+            name = cls if type(cls) is str else cls.__name__
+            key = name + "." + str(id)
+            obj = self.__objects.get(key)
+            if obj is None and key in self.__raw.get(name, {}):
+                data = self.__raw[name].pop(key)
+                obj = classes[data["__class__"]](**data)
+                self.__put(key, obj)
+                self.__cache.setdefault(key, data)
+            if obj is not None and type(obj).__name__ == name:
+                return obj
         return None
 
+    def find(self, cls, filter_by=None, where=None, order_by=None,
+             limit=None, offset=None, after=None, load=None):
+        """returns the objects of cls matching filter_by and where
+
+        filter_by maps fields to the value they must equal; the first one
+        is answered by get() for "id" and by a lookup() index otherwise,
+        as is an ("id", "in", ids) condition of where without filter_by.
+        An ascending order_by is read from an index kept sorted on its
+        fields, so a page after a cursor costs about its length.
+        See models/engine/query.py for where, order_by and after; load is
+        accepted as in all().
+        """
+        name = cls if type(cls) is str else cls.__name__
+        filters = list((filter_by or {}).items())
+        keys = None
+        if filters and filters[0][0] == "id":
+            keys = [name + "." + str(filters.pop(0)[1])]
+        elif filters:
+            keys = self.__ref_index(name, filters[0][0]).get(
+                filters.pop(0)[1])
+        where = [(field, "==", value) for field, value in filters] + \
+            check_where(where)
+        for i, (field, op, value) in enumerate(where):
+            if keys is None and field == "id" and op == "in":
+                keys = dict.fromkeys(name + "." + id for id in value
+                                     if type(id) is str)
+                del where[i]
+                break
+        return self.__find_keys(name, keys, where, order_by, after, limit,
+                                offset)
+
+    def __find_keys(self, name, keys, where, order_by, after, limit, offset):
+        """find() among the keys of class name (all of them if None)
+
+        Without keys, the narrowest range of where on a field is read from
+        a SortedIndex of (field, id). An order_by whose fields all sort the
+        same way is read from a SortedIndex of them.
+        """
+        if after is not None:
+            after_key = check_after(order_by, after)
+        fields = order_fields(order_by)
+        spec = tuple(field for field, descending in fields)
+        ranged = None
+        if keys is None:
+            ranged, keys = self.__range_keys(name, where)
+        directions = {descending for field, descending in fields}
+        if len(directions) == 1:
+            descending = directions.pop()
+            index = self.__ref_index(name, spec)
+            if keys is None:
+                # get() re-indexes the records it builds, so the keys are
+                # read before the index can move under them
+                keys = list(index.before(after) if descending else
+                            index.after(after))
+            elif spec == ranged and after is None:
+                keys = reversed(keys) if descending else keys
+            else:
+                keys = sorted((key for key in keys if key in index.values),
+                              key=index.values.__getitem__,
+                              reverse=descending)
+                if after is not None:
+                    keys = [key for key in keys
+                            if (index.values[key] < after_key if descending
+                                else index.values[key] > after_key)]
+            return self.__window(name, keys, where, limit, offset)
+        if keys is None:
+            keys = list(self.__index().get(name, {})) + \
+                list(self.__raw.get(name, {}))
+        objs = self.__window(name, keys, where, None, None)
+        if order_by is not None:
+            sort_objects(objs, order_by)
+        if after is not None:
+            objs = [obj for obj in objs if is_after(
+                [getattr(obj, field, None) for field in spec], after,
+                order_by)]
+        start = offset or 0
+        if limit is not None:
+            return objs[start:start + limit]
+        return objs[start:]
+
+    def __range_keys(self, name, where):
+        """returns the spec and keys of the narrowest range of where
+
+        The spec is the (field, id) of the SortedIndex the keys were read
+        from, in its order; both are None when where holds no range.
+        """
+        best = None
+        for field, bounds in ranges(where).items():
+            index = self.__ref_index(name, (field, "id"))
+            start, stop = index.span(*bounds)
+            if best is None or stop - start < best[1] - best[0]:
+                best = (start, stop, index, (field, "id"))
+        if best is None:
+            return None, None
+        start, stop, index, spec = best
+        return spec, [index.entries[i][1] for i in range(start, stop)]
+
+    def search(self, cls, text, filter_by=None, where=None, after=None,
+               limit=None, offset=None, load=None):
+        """returns the objects of cls whose text holds a word of text
+
+        They come best match first, ties by id, as ranked by a TextIndex
+        of the text field of cls (see models/engine/text.py), so only the
+        objects holding a word of text are scored. filter_by, where, limit,
+        offset and load are those of find(), and after is a (score, id).
+        """
+        name = cls if type(cls) is str else cls.__name__
+        where = [(field, "==", value) for field, value
+                 in (filter_by or {}).items()] + check_where(where)
+        scores = self.__text_index(name).scores(check_text(text))
+        return self.__ranked(name, scores, scores, where, after, limit,
+                             offset)
+
+    def relevance(self, obj, text):
+        """returns the score search() ranks obj by for text"""
+        name = type(obj).__name__
+        return self.__text_index(name).score(name + "." + obj.id,
+                                             check_text(text))
+
+    def __text_index(self, name):
+        """returns the TextIndex of the text field of class name"""
+        return self.__ref_index(name, text_field(name), TextIndex)
+
+    def __ranked(self, name, keys, scores, where, after, limit, offset):
+        """returns the objects under the scored keys, best first"""
+        keys = sorted((key for key in keys if key in scores),
+                      key=lambda key: (-scores[key], key))
+        if after is not None:
+            keys = [key for key in keys if is_ranked_after(
+                scores[key], key.partition(".")[2], after)]
+        return self.__window(name, keys, where, limit, offset)
+
+    def __window(self, name, keys, where, limit, offset):
+        """returns the objects under keys meeting where, skipping offset"""
+        objs = []
+        skip = offset or 0
+        for key in list(keys) if limit is None else keys:
+            if limit is not None and len(objs) >= limit:
+                break
+            obj = self.get(name, key.partition(".")[2])
+            if obj is None or not matches(obj, where):
+                continue
+            if skip:
+                skip -= 1
+            else:
+                objs.append(obj)
+        return objs
+
+    def search_places(self, states=None, cities=None, amenities=None,
+                      order_by=None, after=None, limit=None, offset=None,
+                      amenities_any=None, bbox=None, near=None, where=None,
+                      text=None, load=None):
+        """returns the places in states or cities that have every amenity
+
+        Candidates are sets of keys taken from the lookup() indexes of
+        City.state_id and Place.city_id, from a GridIndex of the place
+        locations and from a TextIndex of their descriptions, filtered by
+        the bitmaps of a BitmapIndex of Place.amenity_ids, so the cost
+        follows the size of the answer rather than the number of places.
+        amenities_any keeps the places having at least one of its
+        amenities, bbox and near those in an area (see models/engine/geo.py)
+        and text those described with one of its words. Unknown ids are
+        ignored; no states nor cities means every place. where, order_by,
+        after, limit and offset are those of find(), except that places
+        near a point come nearest first, after being a (distance, id), and
+        that without order_by places matching text come as from search().
+        load is that of find().
+        """
+        if near is not None and order_by is not None:
+            raise ValueError("places near a point are ordered by distance")
+        where = check_where(where)
+        keys = None
+        if states or cities:
+            city_ids = {id for id in cities or ()
+                        if self.get("City", id) is not None}
+            by_state = self.__ref_index("City", "state_id")
+            for id in states or ():
+                if self.get("State", id) is not None:
+                    city_ids.update(key.partition(".")[2]
+                                    for key in by_state.get(id))
+            by_city = self.__ref_index("Place", "city_id")
+            keys = set()
+            for id in city_ids:
+                keys.update(by_city.get(id))
+        boxes = [check_bbox(bbox)] if bbox is not None else []
+        if near is not None:
+            near = check_near(near)
+            boxes.append(bbox_around(*near))
+        if boxes:
+            grid = self.__ref_index("Place", ("latitude", "longitude"),
+                                    GridIndex)
+            for box in boxes:
+                inside = set(grid.within(box))
+                keys = inside if keys is None else keys & inside
+        scores = None
+        if text is not None:
+            scores = self.__text_index("Place").scores(check_text(text))
+            keys = set(scores) if keys is None else keys & set(scores)
+        every = {id for id in amenities or ()
+                 if self.get("Amenity", id) is not None}
+        some = {id for id in amenities_any or ()
+                if self.get("Amenity", id) is not None}
+        if every or some:
+            by_amenity = self.__ref_index("Place", "amenity_ids",
+                                          BitmapIndex)
+            if keys is None:
+                bitmap = by_amenity.all_of(every) if every else -1
+                if some:
+                    bitmap &= by_amenity.any_of(some)
+                keys = by_amenity.members(bitmap)
+            else:
+                keys = [key for key in keys if self.__has_amenities(
+                    by_amenity.values.get(key, ()), every, some)]
+        if near is not None:
+            places = [place for km, place in by_distance(
+                self.__window("Place", keys, where, None, None), near,
+                after)]
+            start = offset or 0
+            if limit is not None:
+                return places[start:start + limit]
+            return places[start:]
+        if scores is not None and order_by is None:
+            return self.__ranked("Place", keys, scores, where, after, limit,
+                                 offset)
+        return self.__find_keys("Place", keys, where, order_by, after, limit,
+                                offset)
+
+    @staticmethod
+    def __has_amenities(amenity_ids, every, some):
+        """tells if amenity_ids holds every id of every and one of some"""
+        if not every.issubset(amenity_ids):
+            return False
+        return not some or not some.isdisjoint(amenity_ids)
+
     def count(self, cls=None):
         """count the number of objects in storage based on the class"""
-        return len(self.all(cls))
+        if cls is None:
+            return len(self.__objects) + sum(map(len, self.__raw.values()))
+        name = cls if type(cls) is str else cls.__name__
+        built = self.__index().get(name, {})
+        return len(built) + len(self.__raw.get(name, {}))
+
+    def counts(self):
+        """returns the number of objects of every class"""
+        return {name: self.count(name) for name in classes}
+
+    def pool_stats(self):
+        """returns None, as FileStorage has no connection pool"""
+        return None
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
             key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            self.__remember(key)
+            self.__put(key, obj)
+            self.__dirty[key] = obj
+
+    def bulk_new(self, objs):
+        """adds every obj of objs to __objects and saves them in one write"""
+        for obj in objs:
+            self.new(obj)
+        self.save()
+
+    def bulk_update(self, cls, rows):
+        """sets the fields of the dicts of rows on the objects of cls
+
+        Each row holds the id of its object; rows of unknown ids are
+        skipped, and id, created_at and updated_at are not set from rows.
+        Every change is saved in one write.
+        """
+        now = datetime.now()
+        for row in rows:
+            obj = self.get(cls, row["id"])
+            if obj is None:
+                continue
+            for field, value in row.items():
+                if field not in FIXED_FIELDS:
+                    setattr(obj, field, value)
+            obj.updated_at = now
+        self.save()
+
+    def bulk_delete(self, cls, ids):
+        """deletes the objects of cls of ids and saves that in one write"""
+        for id in ids:
+            self.delete(self.get(cls, id))
+        self.save()
+
+    def touch(self, obj):
+        """flags a stored obj as changed so save() serializes it again"""
+        key = obj.__class__.__name__ + "." + obj.id
+        if self.__objects.get(key) is obj:
+            self.__remember(key)
+            self.__dirty[key] = obj
+            self.__reindex(key, obj)
+
+    def __ref_index(self, name, spec, kind=None):
+        """returns the kind index of spec for class name, building it once
+
+        spec is a field name, or a tuple of field names for a SortedIndex,
+        the default kind of a tuple; FieldIndex is that of a field.
+        """
+        if kind is None:
+            kind = SortedIndex if type(spec) is tuple else FieldIndex
+        self.__index()
+        refs = self.__refs.setdefault(name, {})
+        if (kind, spec) not in refs:
+            index = kind()
+            defaults = kind is not GridIndex
+            index.update([(key, self.__value(spec, obj, defaults=defaults))
+                          for key, obj
+                          in self.__by_class.get(name, {}).items()] +
+                         [(key, self.__value(spec, data=data,
+                                             defaults=defaults))
+                          for key, data in self.__raw.get(name, {}).items()])
+            refs[(kind, spec)] = index
+        return refs[(kind, spec)]
+
+    def lookup(self, cls, field, value):
+        """returns the objects of cls whose field is or lists value"""
+        name = cls if type(cls) is str else cls.__name__
+        objs = []
+        for key in list(self.__ref_index(name, field).get(value)):
+            obj = self.get(name, key.partition(".")[2])
+            if obj is not None:
+                objs.append(obj)
+        return objs
+
+    @contextmanager
+    def __lock(self, exclusive=False):
+        """holds the inter-process lock of __file_path in shared mode"""
+        if not self.__shared or fcntl is None:
+            yield
+            return
+        with open(self.__file_path + ".lock", 'a') as f:
+            fcntl.flock(f.fileno(),
+                        fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def transaction(self):
+        """saves the changes of the block once, at its end, or none of them
+
+        save() does nothing inside the block, and the saves of other
+        threads write the objects it changed as they were last saved. If
+        the block raises, every object it changed is put back as it was
+        last saved. Nested blocks join the outermost one of their thread.
+        """
+        depth = getattr(self.__local, "depth", 0)
+        self.__local.depth = depth + 1
+        if not depth:
+            self.__undo[get_ident()] = {}
+        try:
+            yield self
+        except BaseException:
+            if not depth:
+                self.__rollback()
+            raise
+        finally:
+            self.__local.depth = depth
+            if not depth:
+                del self.__undo[get_ident()]
+        if not depth and self.__dirty:
+            self.save()
+
+    def __remember(self, key):
+        """keeps the saved dict of key for a rollback of the transaction"""
+        undo = self.__undo.get(get_ident())
+        if undo is not None and key not in undo:
+            undo[key] = self.__cache.get(key)
+
+    def __rollback(self):
+        """puts back the objects changed in the transaction as saved"""
+        for key, data in self.__undo[get_ident()].items():
+            self.__dirty.pop(key, None)
+            self.__drop(key)
+            if data is not None:
+                self.__put(key, classes[data["__class__"]](**data))
+                self.__cache[key] = data
+
+    def __held(self):
+        """returns the saved dicts of the objects of open transactions"""
+        held = {}
+        for undo in list(self.__undo.values()):
+            held.update(undo)
+        return held
+
+    def __clean(self, held):
+        """forgets the changes saved, keeping those of open transactions"""
+        for key in list(self.__dirty):
+            if key not in held:
+                self.__dirty.pop(key, None)
 
     def save(self):
         """serializes __objects to the JSON file (path: __file_path)"""
+        if getattr(self.__local, "depth", 0):
+            return
+        with self.__lock(exclusive=True):
+            if self.__shared:
+                self.__refresh()
+            if self.__mode != "journal":
+                self.__compact()
+                return
+            self.__append_journal()
+            if os.path.getsize(self.__journal_path()) > self.__journal_max:
+                self.__compact()
+
+    def __append_journal(self):
+        """appends one record per dirty key to the journal"""
+        held = self.__held()
+        with open(self.__journal_path(), 'ab') as f:
+            if f.tell() and self.__journal_ends_torn():
+                f.write(b"\n")
+            for key, obj in list(self.__dirty.items()):
+                if key in held:
+                    continue
+                if obj is None:
+                    record = {"op": "del", "key": key}
+                else:
+                    record = {"op": "put", "key": key,
+                              "obj": self.__serialize(key, obj)}
+                f.write(self.__codec.dumps(record) + b"\n")
+            self.__flush(f)
+        self.__sync_dir()
+        self.__clean(held)
+        FileStorage.__stamp = self.__file_stamp()
+
+    def __journal_ends_torn(self):
+        """tells if the journal ends with a partially written record"""
+        with open(self.__journal_path(), 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def compact(self):
+        """writes every object to the JSON file and empties the journal"""
+        with self.__lock(exclusive=True):
+            if self.__shared:
+                self.__refresh()
+            self.__compact()
+
+    def __compact(self):
+        """compact() without taking the inter-process lock
+
+        A file that failed to load is never written over, as the objects
+        read from it may be missing what it holds.
+        """
+        if self.__unreadable is not None:
+            raise ValueError("{} failed to load, not overwriting it: {}"
+                             .format(self.__file_path, self.__unreadable))
+        self.__index()
+        held = self.__held()
         json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        for key, obj in list(self.__objects.items()):
+            if key not in held:
+                json_objects[key] = self.__serialize(key, obj)
+        for records in self.__raw.values():
+            json_objects.update(records)
+        for key, data in held.items():
+            if data is not None:
+                json_objects[key] = data
+        self.__write_atomic(json_objects)
+        try:
+            os.remove(self.__journal_path())
+        except OSError:
+            pass
+        else:
+            self.__sync_dir()
+        self.__clean(held)
+        FileStorage.__stamp = self.__file_stamp()
+
+    def __load(self, key, data):
+        """stores the object described by data, caching data as its form"""
+        if self.__shared and key in self.__dirty:
+            # a local change not saved yet wins over the copy on disk
+            return
+        self.__drop(key)
+        if self.__lazy:
+            self.__raw.setdefault(data["__class__"], {})[key] = data
+            self.__reindex(key, data=data)
+        else:
+            self.__put(key, classes[data["__class__"]](**data))
+        self.__cache[key] = data
+        self.__dirty.pop(key, None)
+
+    def __replay(self, offset=0, seen=None):
+        """applies the journal records found past offset to __objects"""
+        try:
+            with open(self.__journal_path(), 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        record = self.__codec.loads(line)
+                    except ValueError:
+                        # a torn record from an interrupted append
+                        continue
+                    key = record["key"]
+                    if record["op"] == "del":
+                        if not (self.__shared and key in self.__dirty):
+                            self.__drop(key)
+                        if seen is not None:
+                            seen.discard(key)
+                    else:
+                        self.__load(key, record["obj"])
+                        if seen is not None:
+                            seen.add(key)
+        except OSError:
+            pass
+
+    def __map_snapshot(self):
+        """serves every clean object from the binary snapshot at the path
+
+        Records are decoded from the memory map when first accessed, as in
+        lazy mode; objects with unsaved changes shadow their record.
+        """
+        snapshot = binary_snapshot.Snapshot(self.__file_path, self.__codec)
+        for key in list(self.__objects):
+            if key not in self.__dirty:
+                self.__drop(key)
+        FileStorage.__raw = {}
+        FileStorage.__refs = {}
+        for name in snapshot.classes:
+            self.__raw[name] = snapshot.section(name)
+        for key in self.__dirty:
+            self.__raw.get(key.partition(".")[0], {}).pop(key, None)
+
+    def __read_file(self):
+        """yields the (key, dict) records of the JSON file"""
+        if self.__stream:
+            with open(self.__file_path, 'r', encoding="utf-8") as f:
+                yield from iter_items(f)
+        else:
+            with open(self.__file_path, 'rb') as f:
+                yield from self.__codec.loads(f.read()).items()
+
+    def reload(self, force=False):
+        """deserializes the JSON file to __objects if it changed on disk"""
+        with self.__lock():
+            self.__refresh(force)
 
-    def reload(self):
-        """deserializes the JSON file to __objects"""
+    def __refresh(self, force=False):
+        """reload() without taking the inter-process lock"""
+        force = force or self.__unreadable is not None
+        old = self.__stamp
+        stamp = self.__file_stamp()
+        if not force and stamp is not None and stamp == old:
+            return
+        if (not force and old is not None and stamp is not None and
+                old[0] == stamp[0] and old[1] is not None and
+                stamp[1] is not None and old[1][2] == stamp[1][2] and
+                old[1][1] <= stamp[1][1]):
+            # only the journal grew since the last read: tail it
+            self.__replay(old[1][1])
+            FileStorage.__stamp = stamp
+            return
+        if binary_snapshot.is_snapshot(self.__file_path):
+            self.__map_snapshot()
+            self.__replay()
+            FileStorage.__unreadable = None
+            FileStorage.__stamp = stamp
+            return
+        seen = set()
+        FileStorage.__unreadable = None
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except Exception:
+            for key, data in self.__read_file():
+                self.__load(key, data)
+                seen.add(key)
+        except FileNotFoundError:
             pass
+        except Exception as error:
+            FileStorage.__unreadable = error
+        self.__replay(seen=seen)
+        if self.__unreadable is not None:
+            # keep what was read and read the file again next time
+            return
+        if self.__shared:
+            # what another process deleted is gone from the files
+            keys = list(self.__objects)
+            for records in self.__raw.values():
+                keys.extend(records)
+            for key in keys:
+                if key not in seen and key not in self.__dirty:
+                    self.__drop(key)
+        FileStorage.__stamp = stamp
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
             key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            self.__remember(key)
+            if self.__drop(key) is not None:
+                self.__dirty[key] = None
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
+        """call reload() to pick up changes made to the JSON file"""
         self.reload()
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""
+Contains the geographic helpers of the storage engines' search_places()
+
+Points are (latitude, longitude) in degrees and distances are kilometres
+on a sphere of the mean Earth radius. A bbox is (south, west, north, east),
+with west above east when it crosses the antimeridian, and near is
+(latitude, longitude, radius).
+"""
+
+from math import asin, cos, degrees, radians, sin, sqrt
+
+EARTH_RADIUS = 6371.0088
+
+
+def distance(latitude, longitude, other_latitude, other_longitude):
+    """returns the great-circle distance between two points"""
+    dlat = radians(other_latitude - latitude)
+    dlon = radians(other_longitude - longitude)
+    a = sin(dlat / 2) ** 2 + cos(radians(latitude)) * \
+        cos(radians(other_latitude)) * sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(a)))
+
+
+def check_bbox(bbox):
+    """returns bbox as a tuple of floats, raising ValueError if invalid"""
+    south, west, north, east = map(float, bbox)
+    if not -90 <= south <= north <= 90 or \
+            not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("invalid bbox {!r}".format(bbox))
+    return south, west, north, east
+
+
+def check_near(near):
+    """returns near as a tuple of floats, raising ValueError if invalid"""
+    latitude, longitude, radius = map(float, near)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or \
+            not radius >= 0:
+        raise ValueError("invalid near {!r}".format(near))
+    return latitude, longitude, radius
+
+
+def bbox_around(latitude, longitude, radius):
+    """returns the smallest bbox holding the points within radius"""
+    angle = radius / EARTH_RADIUS
+    south = max(-90.0, latitude - degrees(angle))
+    north = min(90.0, latitude + degrees(angle))
+    if south == -90 or north == 90 or sin(angle) >= cos(radians(latitude)):
+        return south, -180.0, north, 180.0
+    spread = degrees(asin(sin(angle) / cos(radians(latitude))))
+    west, east = longitude - spread, longitude + spread
+    return (south, west + 360 if west < -180 else west,
+            north, east - 360 if east > 180 else east)
+
+
+def in_bbox(latitude, longitude, bbox):
+    """tells if the point lies in bbox"""
+    south, west, north, east = bbox
+    if not south <= latitude <= north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
+
+
+def by_distance(places, near, after=None):
+    """returns the (distance, place) of places within near, nearest first
+
+    Ties are ordered by id; after is a (distance, id) the result starts
+    past.
+    """
+    latitude, longitude, radius = near
+    found = []
+    for place in places:
+        if place.latitude is None or place.longitude is None:
+            continue
+        km = distance(latitude, longitude, place.latitude, place.longitude)
+        if km <= radius and (after is None or (km, place.id) > after):
+            found.append((km, place.id, place))
+    found.sort(key=lambda item: item[:2])
+    return [(km, place) for km, id, place in found]
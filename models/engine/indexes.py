@@ -0,0 +1,401 @@
+#!/usr/bin/python3
+"""
+Contains the secondary index structures used by FileStorage
+"""
+
+import bisect
+from collections import Counter
+from math import isfinite
+from models.engine.query import sort_key
+from models.engine.text import bm25, tokenize
+
+
+def is_hashable(item):
+    """tells if item can be a key of a dictionary"""
+    try:
+        hash(item)
+    except TypeError:
+        return False
+    return True
+
+
+def items_of(value):
+    """returns the values a field value is indexed under
+
+    Items that cannot be dictionary keys, like dicts, are left out.
+    """
+    if type(value) not in (list, tuple):
+        value = () if value is None else (value,)
+    return tuple(item for item in value if is_hashable(item))
+
+
+class FieldIndex:
+    """maps each value of a field to the keys of the objects holding it
+
+    A list or tuple value indexes the key under each of its items. Keys
+    keep the order they were added in.
+    """
+
+    def __init__(self):
+        """Instantiate an empty index"""
+        self.keys = {}
+        self.values = {}
+
+    def add(self, key, value):
+        """indexes key under value, replacing what it was indexed under"""
+        items = items_of(value)
+        if self.values.get(key) == items:
+            return
+        self.remove(key)
+        self.values[key] = items
+        for item in items:
+            self.keys.setdefault(item, {})[key] = None
+
+    def update(self, items):
+        """indexes many (key, value) pairs"""
+        for key, value in items:
+            self.add(key, value)
+
+    def remove(self, key):
+        """removes key from the index"""
+        for item in self.values.pop(key, ()):
+            keys = self.keys.get(item)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self.keys[item]
+
+    def get(self, value):
+        """returns the keys indexed under value"""
+        return self.keys.get(value, {}).keys()
+
+
+class SortedIndex:
+    """keeps keys sorted by a tuple of values so ranges can be read in order
+
+    The values are compared through query.sort_key(), which orders None
+    first and datetimes like the strings of to_dict(), and ranks values
+    by type so that any two compare.
+    """
+
+    # greater than any key, to bisect past every entry of a sort key
+    LAST = "\U0010ffff"
+    # greater than any item of a sort key, to bisect past a first value
+    TOP = (4,)
+
+    def __init__(self):
+        """Instantiate an empty index"""
+        self.entries = []
+        self.values = {}
+
+    def add(self, key, value):
+        """indexes key under the tuple value, moving it if it changed"""
+        value = sort_key(value)
+        if key in self.values:
+            if self.values[key] == value:
+                return
+            self.remove(key)
+        self.values[key] = value
+        bisect.insort(self.entries, (value, key))
+
+    def update(self, items):
+        """indexes many (key, value) pairs at once, sorting a single time"""
+        for key, value in items:
+            self.values[key] = sort_key(value)
+        self.entries = sorted((value, key)
+                              for key, value in self.values.items())
+
+    def remove(self, key):
+        """removes key from the index"""
+        if key in self.values:
+            value = self.values.pop(key)
+            del self.entries[bisect.bisect_left(self.entries, (value, key))]
+
+    def after(self, value=None):
+        """yields the keys whose tuple is above value (all if None)"""
+        start = 0
+        if value is not None:
+            start = bisect.bisect_right(self.entries,
+                                        (sort_key(value), self.LAST))
+        for i in range(start, len(self.entries)):
+            yield self.entries[i][1]
+
+    def before(self, value=None):
+        """yields the keys whose tuple is below value, last first"""
+        stop = len(self.entries)
+        if value is not None:
+            stop = bisect.bisect_left(self.entries, (sort_key(value),))
+        for i in range(stop - 1, -1, -1):
+            yield self.entries[i][1]
+
+    def span(self, low=None, low_strict=False, high=None, high_strict=False):
+        """returns the (start, stop) entries whose first value is in range
+
+        The range goes from low to high; a strict bound is excluded, an
+        open one (None) is not checked, and None values are left out, as
+        are values of another type than the bounds.
+        """
+        start = bisect.bisect_left(self.entries, (((1,),),))
+        stop = len(self.entries)
+        if low is not None:
+            low = sort_key([low])
+            rank = low[0][0]
+            if low_strict:
+                low += (self.TOP,)
+            start = bisect.bisect_left(self.entries, (low,))
+            stop = bisect.bisect_left(self.entries, (((rank + 1,),),))
+        if high is not None:
+            high = sort_key([high])
+            rank = high[0][0]
+            if not high_strict:
+                high += (self.TOP,)
+            start = max(start, bisect.bisect_left(self.entries,
+                                                  (((rank,),),)))
+            stop = min(stop, bisect.bisect_left(self.entries, (high,)))
+        return start, max(start, stop)
+
+    def between(self, *bounds):
+        """yields the keys of span(*bounds) in order"""
+        start, stop = self.span(*bounds)
+        for i in range(start, stop):
+            yield self.entries[i][1]
+
+
+class BitmapIndex:
+    """maps each value of a field to a bitmap of the keys holding it
+
+    Every key gets a dense ordinal, reused once the key is removed, and the
+    bitmap of a value is an int with the bits of its keys' ordinals set, so
+    all_of() and any_of() combine values with one & or | each. A list or
+    tuple value indexes the key under each of its items.
+    """
+
+    def __init__(self):
+        """Instantiate an empty index"""
+        self.bits = {}
+        self.values = {}
+        self.ordinals = {}
+        self.keys = []
+        self.free = []
+
+    def __ordinal(self, key):
+        """assigns key the lowest free ordinal and returns it"""
+        if self.free:
+            ordinal = self.free.pop()
+            self.keys[ordinal] = key
+        else:
+            ordinal = len(self.keys)
+            self.keys.append(key)
+        self.ordinals[key] = ordinal
+        return ordinal
+
+    def add(self, key, value):
+        """indexes key under value, replacing what it was indexed under"""
+        items = items_of(value)
+        if key in self.ordinals and self.values[key] == items:
+            return
+        self.remove(key)
+        bit = 1 << self.__ordinal(key)
+        self.values[key] = items
+        for item in items:
+            self.bits[item] = self.bits.get(item, 0) | bit
+
+    def update(self, items):
+        """indexes many (key, value) pairs, building each bitmap once"""
+        members = {}
+        for key, value in items:
+            if key in self.ordinals:
+                self.add(key, value)
+                continue
+            ordinal = self.__ordinal(key)
+            self.values[key] = items_of(value)
+            for item in self.values[key]:
+                members.setdefault(item, []).append(ordinal)
+        for item, ordinals in members.items():
+            bitmap = bytearray(max(ordinals) // 8 + 1)
+            for ordinal in ordinals:
+                bitmap[ordinal // 8] |= 1 << ordinal % 8
+            self.bits[item] = self.bits.get(item, 0) | int.from_bytes(
+                bitmap, "little")
+
+    def remove(self, key):
+        """removes key from the index, freeing its ordinal"""
+        if key not in self.ordinals:
+            return
+        ordinal = self.ordinals.pop(key)
+        mask = ~(1 << ordinal)
+        for item in self.values.pop(key):
+            bits = self.bits.get(item, 0) & mask
+            if bits:
+                self.bits[item] = bits
+            else:
+                self.bits.pop(item, None)
+        self.keys[ordinal] = None
+        self.free.append(ordinal)
+
+    def get(self, value):
+        """returns the bitmap of the keys indexed under value"""
+        return self.bits.get(value, 0)
+
+    def all_of(self, values):
+        """returns the bitmap of the keys indexed under every value"""
+        bitmaps = sorted((self.get(value) for value in values),
+                         key=int.bit_length)
+        if not bitmaps:
+            return 0
+        bitmap = bitmaps[0]
+        for other in bitmaps[1:]:
+            bitmap &= other
+        return bitmap
+
+    def any_of(self, values):
+        """returns the bitmap of the keys indexed under any value"""
+        bitmap = 0
+        for value in values:
+            bitmap |= self.get(value)
+        return bitmap
+
+    def members(self, bitmap):
+        """yields the keys whose ordinals are set in bitmap"""
+        bits = bin(bitmap)[:1:-1]
+        ordinal = bits.find("1")
+        while ordinal >= 0:
+            yield self.keys[ordinal]
+            ordinal = bits.find("1", ordinal + 1)
+
+
+class GridIndex:
+    """files keys by their (latitude, longitude) on a grid of square cells
+
+    A bbox query reads the cells it overlaps, or every occupied cell when
+    those are fewer, and checks the points in them.
+    """
+
+    # the side of a cell, in degrees
+    CELL = 0.1
+
+    def __init__(self):
+        """Instantiate an empty index"""
+        self.cells = {}
+        self.values = {}
+
+    def __cell(self, point):
+        """returns the cell of point"""
+        return (int(point[0] // self.CELL), int(point[1] // self.CELL))
+
+    def add(self, key, value):
+        """indexes key at the point value, if both are finite numbers"""
+        point = None
+        if value is not None and all(type(coordinate) in (int, float) and
+                                     isfinite(coordinate)
+                                     for coordinate in value):
+            point = (float(value[0]), float(value[1]))
+        if self.values.get(key) == point:
+            return
+        self.remove(key)
+        if point is not None:
+            self.values[key] = point
+            self.cells.setdefault(self.__cell(point), {})[key] = point
+
+    def update(self, items):
+        """indexes many (key, value) pairs"""
+        for key, value in items:
+            self.add(key, value)
+
+    def remove(self, key):
+        """removes key from the index"""
+        point = self.values.pop(key, None)
+        if point is not None:
+            cell = self.__cell(point)
+            del self.cells[cell][key]
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    def within(self, bbox):
+        """yields the keys whose point lies in bbox"""
+        south, west, north, east = bbox
+        if west > east:
+            yield from self.within((south, west, north, 180.0))
+            yield from self.within((south, -180.0, north, east))
+            return
+        rows = range(int(south // self.CELL), int(north // self.CELL) + 1)
+        cols = range(int(west // self.CELL), int(east // self.CELL) + 1)
+        if len(rows) * len(cols) <= len(self.cells):
+            cells = ((row, col) for row in rows for col in cols)
+        else:
+            cells = [cell for cell in self.cells
+                     if cell[0] in rows and cell[1] in cols]
+        for cell in cells:
+            for key, (latitude, longitude) in self.cells.get(cell,
+                                                             {}).items():
+                if south <= latitude <= north and west <= longitude <= east:
+                    yield key
+
+
+class TextIndex:
+    """maps each word of a text field to the keys holding it, and how often
+
+    scores() ranks by BM25 (see models/engine/text.py) the keys holding a
+    word of the query, reading only the postings of those words.
+    """
+
+    def __init__(self):
+        """Instantiate an empty index"""
+        self.postings = {}
+        self.values = {}
+        self.lengths = {}
+        self.total = 0
+
+    def add(self, key, value):
+        """indexes key under the words of the text value"""
+        counts = dict(Counter(tokenize(value)))
+        if self.values.get(key) == counts:
+            return
+        self.remove(key)
+        if not counts:
+            return
+        self.values[key] = counts
+        self.lengths[key] = sum(counts.values())
+        self.total += self.lengths[key]
+        for word, frequency in counts.items():
+            self.postings.setdefault(word, {})[key] = frequency
+
+    def update(self, items):
+        """indexes many (key, value) pairs"""
+        for key, value in items:
+            self.add(key, value)
+
+    def remove(self, key):
+        """removes key from the index"""
+        counts = self.values.pop(key, None)
+        if counts is None:
+            return
+        self.total -= self.lengths.pop(key)
+        for word in counts:
+            keys = self.postings[word]
+            del keys[key]
+            if not keys:
+                del self.postings[word]
+
+    def score(self, key, words):
+        """returns the score of key for the distinct words of a query"""
+        score = 0.0
+        counts = self.values.get(key, {})
+        average = self.total / max(1, len(self.lengths))
+        for word in words:
+            if word in counts:
+                score += bm25(counts[word], self.lengths[key], average,
+                              len(self.postings[word]), len(self.lengths))
+        return score
+
+    def scores(self, words):
+        """returns {key: score} of the keys holding one of words"""
+        scores = {}
+        average = self.total / max(1, len(self.lengths))
+        for word in words:
+            keys = self.postings.get(word, {})
+            for key, frequency in keys.items():
+                scores[key] = scores.get(key, 0.0) + bm25(
+                    frequency, self.lengths[key], average, len(keys),
+                    len(self.lengths))
+        return scores
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""
+Contains the JSON codecs FileStorage can read and write its files with
+"""
+
+import json
+import re
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONCodec:
+    """encodes objects to UTF-8 JSON bytes and decodes them back"""
+
+    def __init__(self, name, dumps, loads):
+        """Instantiate a codec from a pair of dumps/loads functions"""
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        """String representation of the codec"""
+        return "<JSONCodec {}>".format(self.name)
+
+
+def json_dumps(obj):
+    """returns obj as UTF-8 JSON bytes, encoded by the standard json"""
+    return json.dumps(obj).encode("utf-8")
+
+
+def with_fallback(dumps):
+    """returns dumps, falling back to json_dumps on what it cannot encode
+
+    orjson and ujson refuse some values the standard json encodes, like
+    integers past 64 bits; without a fallback the object holding one
+    could never be saved again.
+    """
+    def encode(obj):
+        """returns obj as UTF-8 JSON bytes"""
+        try:
+            return dumps(obj)
+        except (TypeError, OverflowError, ValueError):
+            return json_dumps(obj)
+    return encode
+
+
+codecs = {"json": JSONCodec("json", json_dumps, json.loads)}
+if ujson is not None:
+    codecs["ujson"] = JSONCodec("ujson", with_fallback(
+        lambda obj: ujson.dumps(obj, escape_forward_slashes=False).encode(
+            "utf-8")), ujson.loads)
+if orjson is not None:
+    codecs["orjson"] = JSONCodec("orjson", with_fallback(orjson.dumps),
+                                 orjson.loads)
+
+
+def get_codec(name=None):
+    """returns the codec called name, the standard json one by default
+
+    The faster orjson and ujson are opt-in: orjson reads integers past 64
+    bits back as floats.
+    """
+    return codecs.get(name, codecs["json"])
+
+
+def iter_items(f, chunk_size=1 << 16):
+    """yields the (key, value) pairs of the JSON object in text file f
+
+    The file is read chunk_size characters at a time and every value is
+    decoded as soon as it is complete, so memory use is bounded by the
+    largest value instead of the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    blank = re.compile(r"\s*")
+    state = {"buf": "", "pos": 0, "eof": False}
+
+    def more():
+        """drops what was consumed and reads the next chunk"""
+        chunk = f.read(chunk_size)
+        state["eof"] = not chunk
+        state["buf"] = state["buf"][state["pos"]:] + chunk
+        state["pos"] = 0
+
+    def peek():
+        """skips blanks and returns the next character, "" at the end"""
+        while True:
+            pos = blank.match(state["buf"], state["pos"]).end()
+            state["pos"] = pos
+            if pos < len(state["buf"]) or state["eof"]:
+                return state["buf"][pos:pos + 1]
+            more()
+
+    def expect(chars):
+        """consumes the next character, which must be one of chars"""
+        char = peek()
+        if not char or char not in chars:
+            raise ValueError("expected one of {!r} at offset {}".format(
+                chars, state["pos"]))
+        state["pos"] += 1
+        return char
+
+    def value():
+        """decodes the next JSON value, reading more input if needed"""
+        peek()
+        while True:
+            try:
+                val, end = decoder.raw_decode(state["buf"], state["pos"])
+            except ValueError:
+                if state["eof"]:
+                    raise
+                more()
+                continue
+            after = state["buf"][end:end + 1]
+            cut = type(val) in (int, float) and after in "0123456789.eE+-"
+            if not state["eof"] and (not after or cut):
+                # the value may go on in the next chunk
+                more()
+                continue
+            state["pos"] = end
+            return val
+
+    expect("{")
+    if peek() == "}":
+        return
+    while True:
+        key = value()
+        expect(":")
+        yield key, value()
+        if expect(",}") == "}":
+            return
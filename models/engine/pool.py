@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Contains the connection pool DBStorage opens its connections from
+
+TimedQueuePool is the QueuePool of SQLAlchemy, sized by the HBNB_MYSQL_POOL_*
+settings of DBStorage, that also times how long every checkout waited for
+a connection, so bursts exhausting the pool show in stats().
+"""
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+from threading import Lock
+from time import perf_counter
+
+# upper bounds, in milliseconds, of the buckets of the wait histogram
+WAIT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class WaitHistogram:
+    """counts durations in the buckets bounded by WAIT_BUCKETS"""
+
+    def __init__(self):
+        """Instantiate an empty histogram"""
+        self.counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        """counts a duration of ms milliseconds"""
+        bucket = 0
+        while bucket < len(WAIT_BUCKETS) and ms > WAIT_BUCKETS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def to_dict(self):
+        """returns the histogram as a dictionary, buckets by upper bound"""
+        labels = [str(bound) for bound in WAIT_BUCKETS] + ["+Inf"]
+        return {"count": self.count, "sum_ms": self.total,
+                "max_ms": self.max,
+                "buckets": dict(zip(labels, self.counts))}
+
+
+class TimedQueuePool(QueuePool):
+    """a QueuePool recording the time every checkout waits"""
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate a pool, with the arguments of QueuePool"""
+        super().__init__(*args, **kwargs)
+        self.__lock = Lock()
+        self.__wait = WaitHistogram()
+        self.__timeouts = 0
+
+    def _do_get(self):
+        """checks out a connection, timing the wait for it"""
+        start = perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            with self.__lock:
+                self.__wait.record((perf_counter() - start) * 1000)
+                self.__timeouts += timed_out
+
+    def stats(self):
+        """returns the connections in use and the waits seen so far"""
+        with self.__lock:
+            return {"size": self.size(), "checked_in": self.checkedin(),
+                    "checked_out": self.checkedout(),
+                    "overflow": max(0, self.overflow()),
+                    "timeouts": self.__timeouts,
+                    "wait": self.__wait.to_dict()}
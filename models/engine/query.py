@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""
+Contains the query conditions shared by the storage engines' find()
+
+A where condition is a (field, operator, value) tuple, where operator is
+one of the keys of OPERATORS; an order_by field name starting with "-"
+sorts in descending order. after holds one value per order_by field and
+keeps the objects that sort strictly past it in that order.
+"""
+
+from datetime import datetime
+import operator
+
+OPERATORS = {"==": operator.eq, "!=": operator.ne,
+             "<": operator.lt, "<=": operator.le,
+             ">": operator.gt, ">=": operator.ge,
+             "in": lambda value, values: value in values}
+
+
+def check_where(where):
+    """returns where as a list, raising ValueError on unknown operators"""
+    where = list(where or ())
+    for field, op, value in where:
+        if op not in OPERATORS:
+            raise ValueError("unknown operator {!r} on {}".format(op, field))
+    return where
+
+
+def matches(obj, where):
+    """tells if obj meets every (field, operator, value) condition"""
+    for field, op, value in where:
+        try:
+            if not OPERATORS[op](getattr(obj, field, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def order_fields(order_by):
+    """returns order_by as a list of (field, descending) pairs"""
+    if order_by is None:
+        return []
+    if type(order_by) is str:
+        order_by = [order_by]
+    return [(field.lstrip("-"), field.startswith("-")) for field in order_by]
+
+
+def sort_item(value):
+    """returns the key one value sorts by, ranked by type so any two compare
+
+    None sorts first, then numbers, then strings and datetimes, which
+    compare as the strings to_dict() writes, then any other value by repr.
+    """
+    if value is None:
+        return (0,)
+    if type(value) is datetime:
+        return (2, value.isoformat(timespec="microseconds"))
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, (int, float)) and value == value:
+        return (1, value)
+    return (3, type(value).__name__, repr(value))
+
+
+def sort_key(values):
+    """returns the key values sort by, the same for objects and dicts"""
+    return tuple(sort_item(value) for value in values)
+
+
+def sort_objects(objs, order_by):
+    """sorts objs in place by the fields of order_by, None values first"""
+    for field, descending in reversed(order_fields(order_by)):
+        objs.sort(key=lambda obj: sort_key([getattr(obj, field, None)]),
+                  reverse=descending)
+
+
+def check_after(order_by, after):
+    """returns the sort key of after, which must suit order_by"""
+    if len(order_fields(order_by)) != len(after):
+        raise ValueError("after needs one value per order_by field")
+    return sort_key(after)
+
+
+def is_after(values, after, order_by):
+    """tells if values sort strictly past after in the order of order_by"""
+    for value, bound, (field, descending) in zip(sort_key(values),
+                                                 sort_key(after),
+                                                 order_fields(order_by)):
+        if value != bound:
+            return value < bound if descending else value > bound
+    return False
+
+
+def ranges(where):
+    """returns {field: (low, low_strict, high, high_strict)} of where
+
+    Only the <, <=, > and >= conditions are gathered, keeping the tightest
+    bound of each side; None stands for an open side.
+    """
+    bounds = {}
+    for field, op, value in where:
+        if op not in ("<", "<=", ">", ">=") or value is None:
+            continue
+        low, low_strict, high, high_strict = bounds.get(
+            field, (None, False, None, False))
+        if op[0] == ">":
+            if low is None or (value, op == ">") > (low, low_strict):
+                low, low_strict = value, op == ">"
+        elif high is None or (value, op == "<=") < (high, not high_strict):
+            high, high_strict = value, op == "<"
+        bounds[field] = (low, low_strict, high, high_strict)
+    return bounds
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+"""
+Contains the session DBStorage routes its statements with
+
+RoutingSession reads from one of its replica engines, picked at random for
+the whole session, and writes to its own bind, the primary. Once it has
+written, or has been made sticky, it reads from the primary too, so a
+request sees its own writes whatever the lag of the replicas; DBStorage
+starts a new session per request, which reads from the replicas again.
+"""
+
+import random
+from sqlalchemy.orm import Session
+
+
+class RoutingSession(Session):
+    """a Session reading from replicas until it writes to the primary"""
+
+    def __init__(self, *args, replicas=(), **kwargs):
+        """Instantiate a session, with the arguments of Session
+
+        replicas lists the engines of the replicas of the bind.
+        """
+        super().__init__(*args, **kwargs)
+        self.replica = random.choice(replicas) if replicas else None
+        self.sticky = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """returns the engine of the primary or of a replica for clause"""
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.sticky = True
+        if self.sticky or self.replica is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self.replica
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+Contains the full-text helpers of the storage engines' search()
+
+Texts are split into lowercase words. A query matches the objects whose
+text holds at least one of its words, and FileStorage ranks them by BM25:
+a word weighs more the fewer texts hold it, and a text scores more the
+more often it holds the word, relative to its length.
+"""
+
+from math import log
+import re
+
+# dictionary - <class name> -> the field search() reads the text of
+TEXT_FIELDS = {"Place": "description", "Review": "text"}
+# the saturation of the weight of a word repeated in a text
+K1 = 1.2
+# how much the length of a text discounts its score
+B = 0.75
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """returns the lowercase words of text, none if it is not a string"""
+    if type(text) is not str:
+        return []
+    return WORD.findall(text.lower())
+
+
+def check_text(text):
+    """returns the distinct words of text, raising ValueError if none"""
+    words = list(dict.fromkeys(tokenize(text)))
+    if not words:
+        raise ValueError("no word to search in {!r}".format(text))
+    return words
+
+
+def text_field(name):
+    """returns the text field of class name, raising ValueError if none"""
+    if name not in TEXT_FIELDS:
+        raise ValueError("{} has no text to search".format(name))
+    return TEXT_FIELDS[name]
+
+
+def bm25(frequency, length, average, count, documents):
+    """returns the weight of a word in a text
+
+    frequency is the number of times the text holds the word, length the
+    number of words of the text and average that of every text; count is
+    the number of texts holding the word out of documents.
+    """
+    idf = log(1 + (documents - count + 0.5) / (count + 0.5))
+    return idf * frequency * (K1 + 1) / (
+        frequency + K1 * (1 - B + B * length / average))
+
+
+def is_ranked_after(score, id, after):
+    """tells if (score, id) comes past after, best scores first"""
+    return (-score, id) > (-after[0], after[1])
@@ -35,3 +35,16 @@ class User(BaseModel, Base):
                 safe_pwd = hashed_pwd.hexidigest()
                 kwargs['password'] = safe_pwd
         super().__init__(*args, **kwargs)
+
+    if models.storage_t != 'db':
+        @property
+        def places(self):
+            """getter for list of place instances owned by the user"""
+            from models.place import Place
+            return models.storage.lookup(Place, "user_id", self.id)
+
+        @property
+        def reviews(self):
+            """getter for list of review instances written by the user"""
+            from models.review import Review
+            return models.storage.lookup(Review, "user_id", self.id)
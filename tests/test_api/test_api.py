@@ -1,6 +1,15 @@
 import unittest
+from unittest.mock import patch
 from flask import json
 from api.v1.app import app
+import models
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
 
 
 class TestAPIStatus(unittest.TestCase):
@@ -149,3 +158,313 @@ class TestAPIStatus(unittest.TestCase):
 
         # delete the created state
         self.app.delete('/api/v1/states/{}'.format(state_id))
+
+    def test_get_states_paginated(self):
+        """test paging through /states with limit and after"""
+        ids = [json.loads(self.app.post('/api/v1/states',
+                                        json={'name': str(i)}).data)['id']
+               for i in range(3)]
+        seen = []
+        url = '/api/v1/states?limit=2'
+        while url:
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.data)
+            self.assertLessEqual(len(page), 2)
+            seen.extend(state['id'] for state in page)
+            url = response.headers.get('X-Next-Cursor')
+            if url:
+                self.assertIn('rel="next"', response.headers['Link'])
+                url = '/api/v1/states?limit=2&after=' + url
+        self.assertEqual(len(seen), len(set(seen)))
+        for state_id in ids:
+            self.assertIn(state_id, seen)
+        response = self.app.get('/api/v1/states?limit=1&after=' + ids[1])
+        self.assertEqual([state['id'] for state in json.loads(
+            response.data)], seen[seen.index(ids[1]) + 1:][:1])
+        self.assertEqual(self.app.get('/api/v1/states?limit=0').status_code,
+                         400)
+        self.assertEqual(self.app.get('/api/v1/states?after=nop').status_code,
+                         400)
+        for state_id in ids:
+            self.app.delete('/api/v1/states/{}'.format(state_id))
+
+    def test_get_states_streamed(self):
+        """test that /states streams a JSON array, or NDJSON on request"""
+        ids = [json.loads(self.app.post('/api/v1/states',
+                                        json={'name': str(i)}).data)['id']
+               for i in range(2)]
+        response = self.app.get('/api/v1/states')
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.content_type, 'application/json')
+        states = json.loads(response.data)
+        for state_id in ids:
+            self.assertIn(state_id, [state['id'] for state in states])
+        response = self.app.get('/api/v1/states',
+                                headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.content_type, 'application/x-ndjson')
+        lines = response.data.decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], states)
+        for state_id in ids:
+            self.app.delete('/api/v1/states/{}'.format(state_id))
+
+    def test_get_states_read_by_page(self):
+        """test that /states without a limit reads every page of storage"""
+        ids = [json.loads(self.app.post('/api/v1/states',
+                                        json={'name': str(i)}).data)['id']
+               for i in range(3)]
+        everything = json.loads(self.app.get('/api/v1/states').data)
+        with patch('api.v1.views.pagination.MAX_LIMIT', 1):
+            response = self.app.get('/api/v1/states')
+        self.assertEqual(json.loads(response.data), everything)
+        for state_id in ids:
+            self.assertIn(state_id, [state['id'] for state in everything])
+            self.app.delete('/api/v1/states/{}'.format(state_id))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places_search(self):
+        """test that /places_search finds the places of states and cities"""
+        state = State(name='Search')
+        city = City(name='Search', state_id=state.id)
+        places = [Place(city_id=city.id, name=str(i)) for i in range(3)]
+        for obj in [state, city] + places:
+            storage.new(obj)
+        response = self.app.post('/api/v1/places_search',
+                                 json={'states': [state.id]})
+        self.assertEqual(response.status_code, 200)
+        found = json.loads(response.data)
+        self.assertEqual(sorted(place['id'] for place in found),
+                         sorted(place.id for place in places))
+        response = self.app.post('/api/v1/places_search?limit=2',
+                                 json={'cities': [city.id]})
+        self.assertEqual(len(json.loads(response.data)), 2)
+        self.assertIn('X-Next-Cursor', response.headers)
+        response = self.app.post('/api/v1/places_search', json={})
+        self.assertTrue(len(json.loads(response.data)) >= 3)
+        response = self.app.post('/api/v1/places_search',
+                                 json={'states': [state.id]})
+        self.assertEqual([place['id'] for place in json.loads(
+            response.data)], [place.id for place in sorted(
+                places, key=lambda place: (place.created_at, place.id))])
+        for obj in [state, city] + places:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places_search_near(self):
+        """test that /places_search pages places near a point by distance"""
+        places = [Place(city_id='c', name=str(i), latitude=0.0,
+                        longitude=-123.45 + i / 100) for i in range(4)]
+        for place in places:
+            storage.new(place)
+        body = {'near': {'latitude': 0, 'longitude': -123.45, 'radius': 3}}
+        response = self.app.post('/api/v1/places_search?limit=2', json=body)
+        self.assertEqual([place['id'] for place in json.loads(
+            response.data)], [places[0].id, places[1].id])
+        after = response.headers['X-Next-Cursor']
+        response = self.app.post('/api/v1/places_search?limit=2&after=' +
+                                 after, json=body)
+        found = json.loads(response.data)
+        self.assertEqual([place['id'] for place in found], [places[2].id])
+        self.assertAlmostEqual(found[0]['distance'], 2.22, 2)
+        for bad in ({'bbox': [1, 2]},
+                    {'near': {'latitude': 0, 'longitude': 0,
+                              'radius': 'nan'}}):
+            response = self.app.post('/api/v1/places_search', json=bad)
+            self.assertEqual(response.status_code, 400)
+        for place in places:
+            storage.delete(place)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places_search_near_no_point(self):
+        """test that places whose coordinates are not numbers are skipped"""
+        bad = Place(city_id='c', name='bad', latitude='n/a', longitude=1.0)
+        good = Place(city_id='c', name='good', latitude=0.0, longitude=1.0)
+        for place in (bad, good):
+            storage.new(place)
+        body = {'near': {'latitude': 0, 'longitude': 1, 'radius': 1}}
+        response = self.app.post('/api/v1/places_search', json=body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([place['id'] for place in json.loads(
+            response.data)], [good.id])
+        response = self.app.put('/api/v1/places/' + good.id,
+                                json={'latitude': 'north'})
+        self.assertEqual(response.status_code, 200)
+        response = self.app.post('/api/v1/places_search', json=body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), [])
+        for place in (bad, good):
+            storage.delete(place)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places_search_unhashable_amenity_ids(self):
+        """test that amenity ids that cannot be indexed are left out"""
+        wifi = Amenity(name='wifi')
+        place = Place(city_id='c', name='p', amenity_ids=[wifi.id])
+        for obj in (wifi, place):
+            storage.new(obj)
+        body = {'amenities': [wifi.id]}
+        response = self.app.post('/api/v1/places_search', json=body)
+        self.assertIn(place.id, [found['id'] for found in json.loads(
+            response.data)])
+        response = self.app.put('/api/v1/places/' + place.id,
+                                json={'amenity_ids': [{'x': 1}, wifi.id]})
+        self.assertEqual(response.status_code, 200)
+        response = self.app.post('/api/v1/places_search', json=body)
+        self.assertIn(place.id, [found['id'] for found in json.loads(
+            response.data)])
+        for obj in (wifi, place):
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places_search_filters(self):
+        """test that /places_search filters and sorts by numeric fields"""
+        city = City(name='Filters', state_id='s')
+        places = [Place(city_id=city.id, name=str(i), number_rooms=i,
+                        price_by_night=300 - i * 50) for i in range(5)]
+        for obj in [city] + places:
+            storage.new(obj)
+        body = {'cities': [city.id], 'order_by': 'price_by_night',
+                'filters': {'number_rooms': {'>=': 2},
+                            'price_by_night': {'<': 250}}}
+        response = self.app.post('/api/v1/places_search?limit=2', json=body)
+        self.assertEqual([place['price_by_night'] for place in json.loads(
+            response.data)], [100, 150])
+        response = self.app.post('/api/v1/places_search?limit=2&after=' +
+                                 response.headers['X-Next-Cursor'], json=body)
+        self.assertEqual([place['price_by_night'] for place in json.loads(
+            response.data)], [200])
+        body['order_by'] = '-price_by_night'
+        response = self.app.post('/api/v1/places_search', json=body)
+        self.assertEqual([place['price_by_night'] for place in json.loads(
+            response.data)], [200, 150, 100])
+        for bad in ({'filters': {'name': {'>': 1}}},
+                    {'filters': {'max_guest': {'~': 1}}},
+                    {'order_by': 'name'}):
+            response = self.app.post('/api/v1/places_search', json=bad)
+            self.assertEqual(response.status_code, 400)
+        for obj in [city] + places:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places_search_text(self):
+        """test that /places_search ranks places by the words of q"""
+        places = [Place(name=str(i), description=text) for i, text in
+                  enumerate(["walrus", "walrus walrus narwhal", "narwhal"])]
+        for place in places:
+            storage.new(place)
+        body = {'q': 'Walrus narwhal'}
+        response = self.app.post('/api/v1/places_search?limit=2', json=body)
+        first = [place['id'] for place in json.loads(response.data)]
+        self.assertEqual(first[0], places[1].id)
+        response = self.app.post('/api/v1/places_search?limit=2&after=' +
+                                 response.headers['X-Next-Cursor'], json=body)
+        rest = [place['id'] for place in json.loads(response.data)]
+        self.assertEqual(set(first + rest), {place.id for place in places})
+        self.assertEqual(len(rest), 1)
+        body['order_by'] = '-price_by_night'
+        response = self.app.post('/api/v1/places_search', json=body)
+        self.assertEqual(len(json.loads(response.data)), 3)
+        response = self.app.post('/api/v1/places_search', json={'q': '!'})
+        self.assertEqual(response.status_code, 400)
+        for place in places:
+            storage.delete(place)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reviews_search(self):
+        """test that /reviews_search ranks the reviews of places by q"""
+        reviews = [Review(place_id='p1', text='Lovely lovely pangolin'),
+                   Review(place_id='p1', text='a pangolin'),
+                   Review(place_id='p2', text='pangolin')]
+        for review in reviews:
+            storage.new(review)
+        response = self.app.post('/api/v1/reviews_search',
+                                 json={'q': 'pangolin lovely',
+                                       'places': ['p1']})
+        self.assertEqual([review['id'] for review in json.loads(
+            response.data)], [reviews[0].id, reviews[1].id])
+        response = self.app.post('/api/v1/reviews_search?limit=1&after=' +
+                                 reviews[2].id, json={'q': 'pangolin'})
+        self.assertEqual(len(json.loads(response.data)), 1)
+        self.assertIn('X-Next-Cursor', response.headers)
+        for body in ({}, {'q': ''}, {'q': 5}):
+            response = self.app.post('/api/v1/reviews_search', json=body)
+            self.assertEqual(response.status_code, 400)
+        for review in reviews:
+            storage.delete(review)
+
+    def test_pool_stats(self):
+        """test that /internal/pool is only served with a pool"""
+        response = self.app.get('/api/v1/internal/pool')
+        self.assertEqual(response.status_code, 404)
+        with patch.object(storage, 'pool_stats') as pool_stats:
+            response = self.app.get('/api/v1/internal/pool')
+        self.assertEqual(response.status_code, 404)
+        pool_stats.assert_not_called()
+
+    def test_batch(self):
+        """test that /batch creates objects and their references at once"""
+        state = State(name='Batch')
+        storage.new(state)
+        batch = {'State': [{'name': 'One'}, {'name': 'Two', 'id': 'b-s2'}],
+                 'City': [{'name': 'c1', 'state_id': 'b-s2'},
+                          {'name': 'c2', 'state_id': state.id}]}
+        response = self.app.post('/api/v1/batch', json=batch)
+        self.assertEqual(response.status_code, 201)
+        created = json.loads(response.data)
+        self.assertEqual([obj['name'] for obj in created['State']],
+                         ['One', 'Two'])
+        self.assertEqual(len(created['City']), 2)
+        self.assertEqual(storage.get(City, created['City'][0]['id']).state_id,
+                         'b-s2')
+        for bad in ({'Nope': []}, {'State': [{}]},
+                    {'City': [{'name': 'c', 'state_id': 'unknown'}]},
+                    {'City': [{'name': 'c', 'state_id': ['x']}]},
+                    {'City': [{'name': 'c', 'state_id': state.id,
+                               'id': created['City'][0]['id']}]},
+                    {'City': [{'name': 'c', 'state_id': state.id, 'id': 'd'},
+                              {'name': 'c', 'state_id': state.id, 'id': 'd'}]},
+                    {'City': [{'name': 'c', 'state_id': state.id, 'id': 5}]}):
+            count = storage.count(City)
+            response = self.app.post('/api/v1/batch', json=bad)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(storage.count(City), count)
+        storage.bulk_delete(City, [obj['id'] for obj in created['City']])
+        storage.bulk_delete(State, [obj['id'] for obj in created['State']] +
+                            [state.id])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_delete_state_cascades(self):
+        """test that deleting a state deletes its cities and places too"""
+        state = State(name='Doomed')
+        city = City(name='c', state_id=state.id)
+        place = Place(name='p', city_id=city.id)
+        review = Review(place_id=place.id, text='t')
+        storage.bulk_new([state, city, place, review])
+        response = self.app.delete('/api/v1/states/' + state.id)
+        self.assertEqual(response.status_code, 200)
+        for obj in (state, city, place, review):
+            self.assertIsNone(storage.get(type(obj), obj.id))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_delete_state_cascades_db(self):
+        """test that deleting a state deletes its rows in one commit"""
+        user = User(email='doomed@hbnb.io')
+        user.password = 'pwd'
+        state = State(name='Doomed')
+        city = City(name='c', state_id=state.id)
+        place = Place(name='p', city_id=city.id, user_id=user.id)
+        review = Review(place_id=place.id, user_id=user.id, text='t')
+        amenity = Amenity(name='a')
+        place.amenities.append(amenity)
+        gone = [(type(obj), obj.id) for obj in (state, city, place, review)]
+        kept = [(User, user.id), (Amenity, amenity.id)]
+        storage.bulk_new([user, state, city, place, review, amenity])
+        storage.close()
+        response = self.app.delete('/api/v1/states/' + gone[0][1])
+        self.assertEqual(response.status_code, 200)
+        storage.close()
+        for cls, obj_id in gone:
+            self.assertIsNone(storage.get(cls, obj_id))
+        for cls, obj_id in kept:
+            storage.delete(storage.get(cls, obj_id))
+        storage.save()
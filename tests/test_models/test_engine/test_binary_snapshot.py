@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""
+Contains the TestBinarySnapshotDocs and TestBinarySnapshot classes
+"""
+
+import json
+import models
+from models.engine import binary_snapshot
+from models.engine.file_storage import FileStorage
+from models.city import City
+from models.state import State
+import os
+import pep8
+import tempfile
+import unittest
+
+
+class TestBinarySnapshotDocs(unittest.TestCase):
+    """Tests to check the documentation and style of binary_snapshot"""
+
+    def test_pep8_conformance_binary_snapshot(self):
+        """Test that models/engine/binary_snapshot.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/binary_snapshot.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_binary_snapshot.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_binary_snapshot_module_docstring(self):
+        """Test for the binary_snapshot.py module docstring"""
+        self.assertIsNot(binary_snapshot.__doc__, None,
+                         "binary_snapshot.py needs a docstring")
+        self.assertIsNot(binary_snapshot.Snapshot.__doc__, None,
+                         "Snapshot class needs a docstring")
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    """Test the binary snapshot format and its converters"""
+
+    def setUp(self):
+        """Write a small JSON store to a temporary folder"""
+        self.folder = tempfile.mkdtemp()
+        self.records = {
+            "State.b": {"__class__": "State", "id": "b", "name": "B"},
+            "State.a": {"__class__": "State", "id": "a", "name": "A"},
+            "City.c": {"__class__": "City", "id": "c", "state_id": "a"}}
+        self.json_path = os.path.join(self.folder, "file.json")
+        with open(self.json_path, "w") as f:
+            json.dump(self.records, f)
+
+    def tearDown(self):
+        """Remove the temporary folder"""
+        for name in os.listdir(self.folder):
+            os.remove(os.path.join(self.folder, name))
+        os.rmdir(self.folder)
+
+    def test_round_trip(self):
+        """Test that converting to binary and back keeps every record"""
+        snap = os.path.join(self.folder, "file.snap")
+        back = os.path.join(self.folder, "back.json")
+        binary_snapshot.json_to_binary(self.json_path, snap)
+        self.assertTrue(binary_snapshot.is_snapshot(snap))
+        self.assertFalse(binary_snapshot.is_snapshot(self.json_path))
+        binary_snapshot.binary_to_json(snap, back)
+        with open(back, "r") as f:
+            self.assertEqual(json.load(f), self.records)
+
+    def test_section(self):
+        """Test lookups and in-memory changes on a class section"""
+        snap = os.path.join(self.folder, "file.snap")
+        binary_snapshot.json_to_binary(self.json_path, snap)
+        snapshot = binary_snapshot.Snapshot(snap)
+        states = snapshot.section("State")
+        self.assertEqual(len(states), 2)
+        self.assertEqual(list(states), ["State.a", "State.b"])
+        self.assertEqual(states["State.b"], self.records["State.b"])
+        self.assertNotIn("State.c", states)
+        self.assertNotIn("City.c", states)
+        states["State.a"] = {"name": "new"}
+        del states["State.b"]
+        self.assertEqual(len(states), 1)
+        self.assertEqual(dict(states), {"State.a": {"name": "new"}})
+        with self.assertRaises(KeyError):
+            del states["State.b"]
+        snapshot.map.close()
+
+    def test_long_ids(self):
+        """Test that ids of any length are stored and found"""
+        snap = os.path.join(self.folder, "file.snap")
+        long_id = "é" * 100
+        records = {"State.z": {"id": "z"}, "State." + long_id: {"id": "l"},
+                   "State.": {"id": ""}}
+        with open(snap, "wb") as f:
+            binary_snapshot.dump(records, f)
+        snapshot = binary_snapshot.Snapshot(snap)
+        self.assertEqual(dict(snapshot.items()), records)
+        states = snapshot.section("State")
+        self.assertEqual(states["State." + long_id], {"id": "l"})
+        self.assertEqual(states["State."], {"id": ""})
+        self.assertNotIn("State." + long_id[1:], states)
+        snapshot.map.close()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_file_storage_binary_format(self):
+        """Test that FileStorage writes, maps and updates a snapshot"""
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__objects,
+                 FileStorage._FileStorage__raw,
+                 FileStorage._FileStorage__format,
+                 FileStorage._FileStorage__stamp)
+        FileStorage._FileStorage__file_path = self.json_path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        FileStorage._FileStorage__format = "binary"
+        try:
+            storage = FileStorage()
+            storage.reload(force=True)
+            storage.compact()
+            self.assertTrue(binary_snapshot.is_snapshot(self.json_path))
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            self.assertEqual(storage._FileStorage__objects, {})
+            self.assertEqual(storage.count(State), 2)
+            self.assertEqual(storage.get(State, "a").name, "A")
+            self.assertEqual(storage.count(State), 2)
+            storage.delete(storage.get(State, "b"))
+            storage.new(City(state_id="a"))
+            storage.save()
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            self.assertEqual(storage.count(State), 1)
+            self.assertEqual(storage.count(City), 2)
+            self.assertEqual(len(storage.all()), 3)
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            storage.new(State(id="a", name="new"))
+            self.assertEqual(storage.count(State), 1)
+            storage.compact()
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            self.assertEqual(storage.get(State, "a").name, "new")
+        finally:
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__objects,
+             FileStorage._FileStorage__raw,
+             FileStorage._FileStorage__format,
+             FileStorage._FileStorage__stamp) = saved
@@ -17,6 +17,7 @@ from models.user import User
 import json
 import os
 import pep8
+import sqlalchemy
 import unittest
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
@@ -107,6 +108,48 @@ class TestFileStorage(unittest.TestCase):
         with self.assertRaises(TypeError):
             storage.get()
 
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_load(self):
+        """Test that loaded relationships cost one query per step"""
+        storage = models.storage
+        for i in range(3):
+            state = State(name=str(i))
+            storage.new(state)
+            for j in range(3):
+                storage.new(City(name=str(j), state_id=state.id))
+        storage.save()
+        storage.close()
+        queries = []
+        engine = storage._DBStorage__engine
+
+        def count(*args):
+            """counts a query"""
+            queries.append(args)
+        sqlalchemy.event.listen(engine, "before_cursor_execute", count)
+        try:
+            states = storage.find(State, load=["cities.places"])
+            for state in states:
+                for city in state.cities:
+                    city.places
+            self.assertEqual(len(queries), 3)
+            with self.assertRaises(ValueError):
+                storage.find(State, load=["nope"])
+        finally:
+            sqlalchemy.event.remove(engine, "before_cursor_execute", count)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_bulk_update(self):
+        """Test that bulk_update skips the rows of unknown ids"""
+        storage = models.storage
+        state = State(name='Arizona')
+        storage.new(state)
+        storage.save()
+        storage.bulk_update(State, [{"id": state.id, "name": "new"},
+                                    {"id": "nop", "name": "nop"}])
+        self.assertEqual(storage.get(State, state.id).name, "new")
+        self.assertIsNone(storage.get(State, "nop"))
+        State(name='Colorado').save()
+
     @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
     def test_count(self):
         """Test that count returns the number of objects based on class"""
@@ -7,6 +7,7 @@ from datetime import datetime
 import inspect
 import models
 from models.engine import file_storage
+from models.engine.json_codec import codecs
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -17,6 +18,9 @@ from models.user import User
 import json
 import os
 import pep8
+import subprocess
+import sys
+import threading
 import unittest
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
@@ -153,3 +157,743 @@ class TestFileStorage(unittest.TestCase):
         self.assertGreater(storage.count(), storage.count(State))
         with self.assertRaises(TypeError):
             storage.count(State, 'invld')
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_cls_is_live_view(self):
+        """Test that all(cls) tracks new() and delete() of that class"""
+        storage = models.storage
+        states = storage.all(State)
+        obj = State(name='Ohio')
+        storage.new(obj)
+        self.assertIs(states["State." + obj.id], obj)
+        self.assertIs(storage.all("State")["State." + obj.id], obj)
+        self.assertIs(storage.all("State", load=["cities"])[
+            "State." + obj.id], obj)
+        self.assertNotIn("State." + obj.id, storage.all(City))
+        storage.delete(obj)
+        self.assertNotIn("State." + obj.id, states)
+        self.assertIsNone(storage.get(State, obj.id))
+        self.assertIsNone(storage.get(City, obj.id))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_skips_unchanged_file(self):
+        """Test that reload only re-reads file.json when it changed"""
+        storage = models.storage
+        obj = State(name='Texas')
+        obj.save()
+        obj.name = 'Unsaved'
+        storage.reload()
+        self.assertIs(storage.get(State, obj.id), obj)
+        storage.close()
+        self.assertIs(storage.get(State, obj.id), obj)
+        storage.reload(force=True)
+        self.assertIsNot(storage.get(State, obj.id), obj)
+        self.assertEqual(storage.get(State, obj.id).name, 'Texas')
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_journal_mode(self):
+        """Test that journal mode appends changes and replays them"""
+        path = "test_journal.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__objects,
+                 FileStorage._FileStorage__mode,
+                 FileStorage._FileStorage__stamp)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__mode = "journal"
+        try:
+            storage = FileStorage()
+            kept = State(name='Kept')
+            gone = State(name='Gone')
+            storage.new(kept)
+            storage.new(gone)
+            storage.save()
+            storage.delete(gone)
+            storage.save()
+            self.assertFalse(os.path.exists(path))
+            with open(path + ".journal", "r") as f:
+                self.assertEqual(len(f.readlines()), 3)
+            with open(path + ".journal", "a") as f:
+                f.write('{"op": "put", "key": "State.torn"')
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            self.assertEqual(list(storage.all()), ["State." + kept.id])
+            self.assertEqual(storage.get(State, kept.id).name, 'Kept')
+            storage.compact()
+            self.assertFalse(os.path.exists(path + ".journal"))
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            self.assertEqual(list(storage.all()), ["State." + kept.id])
+        finally:
+            for name in (path, path + ".journal"):
+                if os.path.exists(name):
+                    os.remove(name)
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__objects,
+             FileStorage._FileStorage__mode,
+             FileStorage._FileStorage__stamp) = saved
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_reserializes_changed_objects(self):
+        """Test that attribute changes reach file.json on the next save"""
+        storage = models.storage
+        obj = State(name='Maine')
+        obj.save()
+        obj.name = 'Vermont'
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["State." + obj.id]["name"], 'Vermont')
+        self.assertEqual(js["State." + obj.id], obj.to_dict())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_replaces_file_atomically(self):
+        """Test that save writes through a temp file for every fsync level"""
+        storage = models.storage
+        saved = FileStorage._FileStorage__fsync
+        try:
+            for level in ("none", "file", "dir"):
+                with self.subTest(level=level):
+                    FileStorage._FileStorage__fsync = level
+                    obj = State(name=level)
+                    obj.save()
+                    with open("file.json", "r") as f:
+                        js = json.load(f)
+                    self.assertEqual(js["State." + obj.id]["name"], level)
+                    self.assertEqual([name for name in os.listdir(".")
+                                      if name.endswith(".tmp")], [])
+        finally:
+            FileStorage._FileStorage__fsync = saved
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_keeps_unreadable_file(self):
+        """Test that save never writes over a file that failed to load"""
+        path = "test_unreadable.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__objects,
+                 FileStorage._FileStorage__stamp)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__objects = {}
+        try:
+            storage = FileStorage()
+            state = State(name='Kept')
+            storage.new(state)
+            storage.save()
+            with open(path, "r") as f:
+                text = f.read()
+            with open(path, "w") as f:
+                f.write(text[:-1])
+            storage.reload()
+            storage.new(State(name='New'))
+            with self.assertRaises(ValueError):
+                storage.save()
+            with open(path, "r") as f:
+                self.assertEqual(f.read(), text[:-1])
+            with open(path, "w") as f:
+                f.write(text)
+            storage.reload()
+            storage.save()
+            with open(path, "r") as f:
+                self.assertEqual(len(json.load(f)), 2)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__objects,
+             FileStorage._FileStorage__stamp) = saved
+            FileStorage._FileStorage__unreadable = None
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_shared_mode_keeps_concurrent_writes(self):
+        """Test that shared mode merges the writes of several processes"""
+        path = os.path.abspath("test_shared.json")
+        script = ("from models.engine.file_storage import FileStorage\n"
+                  "from models.state import State\n"
+                  "FileStorage._FileStorage__file_path = {!r}\n"
+                  "FileStorage._FileStorage__objects = {{}}\n"
+                  "FileStorage._FileStorage__stamp = None\n"
+                  "for i in range(20):\n"
+                  "    State(name='w').save()\n").format(path)
+        env = dict(os.environ, HBNB_FS_SHARED="1")
+        for mode in ("snapshot", "journal"):
+            with self.subTest(mode=mode):
+                env["HBNB_FS_MODE"] = mode
+                try:
+                    workers = [subprocess.Popen([sys.executable, "-c",
+                                                 script], env=env)
+                               for i in range(3)]
+                    for worker in workers:
+                        self.assertEqual(worker.wait(), 0)
+                    count = subprocess.check_output(
+                        [sys.executable, "-c", script.split("for")[0] +
+                         "FileStorage().reload()\n"
+                         "print(FileStorage().count(State))\n"], env=env)
+                    self.assertEqual(int(count), 60)
+                finally:
+                    for name in (path, path + ".journal", path + ".lock"):
+                        if os.path.exists(name):
+                            os.remove(name)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_codecs_round_trip(self):
+        """Test that every installed codec reloads what it saved"""
+        storage = models.storage
+        saved = FileStorage._FileStorage__codec
+        try:
+            for name, codec in codecs.items():
+                with self.subTest(codec=name):
+                    FileStorage._FileStorage__codec = codec
+                    obj = Place(name='Loft', latitude=1.5, amenity_ids=['a'])
+                    obj.save()
+                    storage.reload(force=True)
+                    new = storage.get(Place, obj.id)
+                    self.assertIsNot(new, obj)
+                    self.assertEqual(new.to_dict(), obj.to_dict())
+        finally:
+            FileStorage._FileStorage__codec = saved
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_codecs_big_integer(self):
+        """Test that an integer past 64 bits never makes save() fail"""
+        storage = models.storage
+        saved = FileStorage._FileStorage__codec
+        big = 123456789012345678901234567890
+        self.assertIs(file_storage.get_codec(), codecs["json"])
+        try:
+            for name, codec in codecs.items():
+                with self.subTest(codec=name):
+                    FileStorage._FileStorage__codec = codec
+                    obj = State(name="Big", population=big)
+                    obj.save()
+                    after = State(name="After")
+                    after.save()
+                    storage.reload(force=True)
+                    if name == "json":
+                        self.assertEqual(
+                            storage.get(State, obj.id).population, big)
+                    storage.delete(storage.get(State, obj.id))
+                    storage.delete(storage.get(State, after.id))
+        finally:
+            FileStorage._FileStorage__codec = saved
+            storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lazy_reload(self):
+        """Test that lazy mode builds objects only when they are accessed"""
+        path = "test_lazy.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__objects,
+                 FileStorage._FileStorage__lazy,
+                 FileStorage._FileStorage__raw,
+                 FileStorage._FileStorage__stamp)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        try:
+            storage = FileStorage()
+            state = State(name='Lazy')
+            city = City(name='Town', state_id=state.id)
+            storage.new(state)
+            storage.new(city)
+            storage.save()
+            FileStorage._FileStorage__lazy = True
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            self.assertEqual(storage._FileStorage__objects, {})
+            self.assertEqual(storage.count(), 2)
+            self.assertEqual(storage.count(State), 1)
+            self.assertEqual(storage.get(State, state.id).name, 'Lazy')
+            self.assertEqual(list(storage._FileStorage__objects),
+                             ["State." + state.id])
+            storage.save()
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            self.assertEqual(list(storage.all(City)), ["City." + city.id])
+            self.assertEqual(len(storage.all()), 2)
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            storage.new(City(id=city.id, name='New', state_id=state.id))
+            self.assertEqual(storage.count(City), 1)
+            storage.save()
+            with open(path, "r") as f:
+                self.assertEqual(json.load(f)["City." + city.id]["name"],
+                                 'New')
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__objects,
+             FileStorage._FileStorage__lazy,
+             FileStorage._FileStorage__raw,
+             FileStorage._FileStorage__stamp) = saved
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lazy_find(self):
+        """Test that find() sorts and filters records by their defaults"""
+        path = "test_lazy_find.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__objects,
+                 FileStorage._FileStorage__lazy,
+                 FileStorage._FileStorage__raw,
+                 FileStorage._FileStorage__stamp)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        try:
+            storage = FileStorage()
+            places = [Place(name=str(i)) for i in range(6)]
+            for place in places:
+                storage.new(place)
+            storage.save()
+            FileStorage._FileStorage__lazy = True
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            found = storage.find(Place, order_by=("price_by_night", "id"),
+                                 limit=10)
+            self.assertEqual([place.id for place in found],
+                             sorted(place.id for place in places))
+            self.assertEqual({place.price_by_night for place in found}, {0})
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            ids = sorted(place.id for place in places)
+            cheap = storage.find(Place, where=[("price_by_night", ">=", 0)])
+            self.assertEqual(sorted(place.id for place in cheap), ids)
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            storage.get(Place, places[0].id)
+            cheap = storage.search_places(
+                where=[("price_by_night", "<", 1)],
+                order_by=("-price_by_night", "-id"))
+            self.assertEqual([place.id for place in cheap], ids[::-1])
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__objects,
+             FileStorage._FileStorage__lazy,
+             FileStorage._FileStorage__raw,
+             FileStorage._FileStorage__stamp) = saved
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lazy_locations(self):
+        """Test that places never located are kept out of area searches"""
+        path = "test_lazy_locations.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__objects,
+                 FileStorage._FileStorage__lazy,
+                 FileStorage._FileStorage__raw,
+                 FileStorage._FileStorage__stamp)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        try:
+            storage = FileStorage()
+            places = [Place(name=str(i)) for i in range(3)]
+            origin = Place(name='origin', latitude=0.0, longitude=0.0)
+            for place in places + [origin]:
+                storage.new(place)
+            bbox = [-1, -1, 1, 1]
+            found = storage.search_places(bbox=bbox)
+            self.assertEqual([place.id for place in found], [origin.id])
+            storage.save()
+            FileStorage._FileStorage__lazy = True
+            FileStorage._FileStorage__objects = {}
+            storage.reload(force=True)
+            found = storage.search_places(bbox=bbox)
+            self.assertEqual([place.id for place in found], [origin.id])
+            storage.all(Place)
+            found = storage.search_places(near=(0, 0, 10))
+            self.assertEqual([place.id for place in found], [origin.id])
+            place = storage.get(Place, places[0].id)
+            place.latitude, place.longitude = 0.5, 0.5
+            found = storage.search_places(bbox=bbox)
+            self.assertEqual({place.id for place in found},
+                             {origin.id, places[0].id})
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__objects,
+             FileStorage._FileStorage__lazy,
+             FileStorage._FileStorage__raw,
+             FileStorage._FileStorage__stamp) = saved
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_stream_reload(self):
+        """Test that the streaming loader reloads the same objects"""
+        storage = models.storage
+        obj = Place(name='Streamed', number_rooms=3)
+        obj.save()
+        saved = FileStorage._FileStorage__stream
+        FileStorage._FileStorage__stream = True
+        try:
+            storage.reload(force=True)
+        finally:
+            FileStorage._FileStorage__stream = saved
+        self.assertIsNot(storage.get(Place, obj.id), obj)
+        self.assertEqual(storage.get(Place, obj.id).to_dict(), obj.to_dict())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lookup_follows_changes(self):
+        """Test that lookup() indexes stay in sync with the stored objects"""
+        storage = models.storage
+        state = State(name='Utah')
+        other = State(name='Idaho')
+        city = City(name='Provo', state_id=state.id)
+        storage.new(state)
+        storage.new(other)
+        storage.new(city)
+        self.assertEqual(state.cities, [city])
+        self.assertEqual(storage.lookup(City, "state_id", other.id), [])
+        city.state_id = other.id
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other.cities, [city])
+        late = City(name='Boise', state_id=other.id)
+        storage.new(late)
+        self.assertEqual(other.cities, [city, late])
+        storage.delete(city)
+        self.assertEqual(other.cities, [late])
+        place = Place(city_id=late.id, user_id="u")
+        storage.new(place)
+        self.assertEqual(late.places, [place])
+        storage.delete(late)
+        storage.delete(place)
+        storage.delete(state)
+        storage.delete(other)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_counts(self):
+        """Test that counts returns count() of every class at once"""
+        storage = models.storage
+        counts = storage.counts()
+        self.assertEqual(sorted(counts), sorted(classes))
+        for name, value in counts.items():
+            self.assertEqual(value, storage.count(classes[name]))
+        self.assertEqual(sum(counts.values()), storage.count())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_find(self):
+        """Test that find filters, orders and windows objects of a class"""
+        storage = models.storage
+        city = City(name='Find', state_id='s')
+        storage.new(city)
+        places = [Place(city_id=city.id, name=str(i), price_by_night=i)
+                  for i in (30, 10, 20)]
+        for place in places:
+            storage.new(place)
+        found = storage.find(Place, filter_by={"city_id": city.id},
+                             order_by="price_by_night")
+        self.assertEqual([p.price_by_night for p in found], [10, 20, 30])
+        found = storage.find("Place", filter_by={"city_id": city.id},
+                             where=[("price_by_night", ">", 10)],
+                             order_by="-price_by_night", limit=1)
+        self.assertEqual(found, [places[0]])
+        found = storage.find(Place, filter_by={"city_id": city.id,
+                                               "name": "20"})
+        self.assertEqual(found, [places[2]])
+        found = storage.find(Place, filter_by={"id": places[1].id,
+                                               "city_id": city.id})
+        self.assertEqual(found, [places[1]])
+        found = storage.find(City, where=[("id", "in", [city.id])],
+                             offset=1)
+        self.assertEqual(found, [])
+        with self.assertRaises(ValueError):
+            storage.find(City, where=[("name", "~", "x")])
+        for obj in places + [city]:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_find_mixed_types(self):
+        """Test that a value of another type keeps the indexes usable"""
+        storage = models.storage
+        places = [Place(city_id='c', price_by_night=i) for i in (10, 20)]
+        for place in places:
+            storage.new(place)
+        where = [("price_by_night", ">=", 10), ("city_id", "==", "c")]
+        self.assertEqual(len(storage.find(Place, where=where)), 2)
+        places[0].price_by_night = "cheap"
+        self.assertEqual(storage.find(Place, where=where), [places[1]])
+        self.assertEqual(storage.find(Place, where=where,
+                                      order_by="price_by_night"),
+                         [places[1]])
+        places[0].price_by_night = 5
+        self.assertEqual(storage.find(Place, where=[
+            ("city_id", "==", "c")], order_by="price_by_night"), places)
+        for place in places:
+            storage.delete(place)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_find_after(self):
+        """Test that find pages through a class after a cursor"""
+        storage = models.storage
+        states = [State(name=str(i)) for i in range(5)]
+        for state in states:
+            storage.new(state)
+        order = sorted(storage.all(State).values(),
+                       key=lambda s: (s.created_at, s.id))
+        first = storage.find(State, order_by=("created_at", "id"), limit=2)
+        self.assertEqual(first, order[:2])
+        last = first[-1]
+        rest = storage.find(State, order_by=("created_at", "id"),
+                            after=(last.created_at, last.id))
+        self.assertEqual(rest, order[2:])
+        city = City(name="After", state_id=states[0].id)
+        storage.new(city)
+        self.assertEqual(storage.find(State, order_by=("created_at", "id"),
+                                      after=(city.created_at, city.id)), [])
+        found = storage.find(City, filter_by={"state_id": states[0].id},
+                             order_by=("created_at", "id"),
+                             after=(city.created_at, ""))
+        self.assertEqual(found, [city])
+        storage.delete(order[0])
+        self.assertNotIn(order[0], storage.find(
+            State, order_by=("created_at", "id")))
+        newest = storage.find(State, order_by=("-created_at", "-id"))
+        self.assertEqual(newest, order[:0:-1])
+        self.assertEqual(storage.find(State, order_by=("-created_at", "-id"),
+                                      after=(order[3].created_at,
+                                             order[3].id)), order[2:0:-1])
+        self.assertEqual(storage.find(State, order_by=("-name", "id"),
+                                      after=("4", "")),
+                         [obj for obj in storage.find(
+                             State, order_by=("-name", "id"))
+                          if obj.name < "4" or obj.name == "4"])
+        with self.assertRaises(ValueError):
+            storage.find(State, order_by="-id", after=("x", "y"))
+        for obj in states + [city]:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_bulk(self):
+        """Test that bulk changes are applied and saved in one write"""
+        storage = models.storage
+        states = [State(name=str(i)) for i in range(50)]
+        storage.bulk_new(states)
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertTrue(all("State." + state.id in saved
+                            for state in states))
+        storage.bulk_update(State, [{"id": state.id, "name": "new",
+                                     "created_at": "nop"}
+                                    for state in states[:10]] +
+                            [{"id": "nop", "name": "nop"}])
+        self.assertEqual([state.name for state in states[:11]],
+                         ["new"] * 10 + ["10"])
+        self.assertIs(type(states[0].created_at), datetime)
+        self.assertGreater(states[0].updated_at, states[10].updated_at)
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)["State." + states[0].id]["name"],
+                             "new")
+        storage.bulk_delete(State, [state.id for state in states])
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertFalse(any("State." + state.id in saved
+                             for state in states))
+        self.assertIsNone(storage.get(State, states[0].id))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_find_ids(self):
+        """Test that find reads an id in condition by key"""
+        storage = models.storage
+        states = [State(name=str(i)) for i in range(3)]
+        for state in states:
+            storage.new(state)
+        ids = [states[2].id, "nop", states[0].id, states[2].id, 5]
+        found = storage.find(State, where=[("id", "in", ids)])
+        self.assertEqual(found, [states[2], states[0]])
+        found = storage.find(State, where=[("id", "in", ids),
+                                           ("name", "!=", "2")],
+                             order_by="name")
+        self.assertEqual(found, [states[0]])
+        self.assertEqual(storage.find(City, where=[("id", "in", ids)]), [])
+        for state in states:
+            storage.delete(state)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_transaction(self):
+        """Test that a transaction saves once, or rolls every change back"""
+        storage = models.storage
+        kept, gone = State(name="kept"), State(name="gone")
+        storage.bulk_new([kept, gone])
+        with storage.transaction():
+            kept.name = "renamed"
+            kept.save()
+            with open("file.json", "r") as f:
+                self.assertEqual(json.load(f)["State." + kept.id]["name"],
+                                 "kept")
+            with storage.transaction():
+                State(name="inner").save()
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)["State." + kept.id]["name"],
+                             "renamed")
+        added = State(name="added")
+        with self.assertRaises(KeyError):
+            with storage.transaction():
+                kept.name = "lost"
+                kept.save()
+                added.save()
+                storage.delete(gone)
+                storage.save()
+                raise KeyError("abort")
+        self.assertEqual(storage.get(State, kept.id).name, "renamed")
+        self.assertIsNone(storage.get(State, added.id))
+        self.assertEqual(storage.get(State, gone.id).name, "gone")
+        storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(saved["State." + kept.id]["name"], "renamed")
+        self.assertNotIn("State." + added.id, saved)
+        self.assertIn("State." + gone.id, saved)
+        storage.bulk_delete(State, [kept.id, gone.id])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_transaction_threads(self):
+        """Test that a transaction holds back only its own thread's changes"""
+        storage = models.storage
+        other = []
+
+        def save_other():
+            """saves a state and a change from another thread"""
+            other.append(State(name="other"))
+            other[0].save()
+        for fail in (False, True):
+            with self.subTest(fail=fail):
+                kept, mine = State(name="kept"), State(name="mine")
+                storage.bulk_new([kept])
+                try:
+                    with storage.transaction():
+                        mine.save()
+                        kept.name = "renamed"
+                        kept.save()
+                        thread = threading.Thread(target=save_other)
+                        thread.start()
+                        thread.join()
+                        with open("file.json", "r") as f:
+                            saved = json.load(f)
+                        self.assertIn("State." + other[-1].id, saved)
+                        self.assertNotIn("State." + mine.id, saved)
+                        self.assertEqual(saved["State." + kept.id]["name"],
+                                         "kept")
+                        if fail:
+                            raise KeyError("abort")
+                except KeyError:
+                    pass
+                self.assertIs(storage.get(State, other[-1].id), other[-1])
+                with open("file.json", "r") as f:
+                    saved = json.load(f)
+                self.assertIn("State." + other[-1].id, saved)
+                self.assertEqual("State." + mine.id in saved, not fail)
+                self.assertEqual(saved["State." + kept.id]["name"],
+                                 "kept" if fail else "renamed")
+                storage.bulk_delete(State, [state.id for state in
+                                            other + [kept, mine]])
+                other.clear()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_search(self):
+        """Test that search ranks the objects holding a word of the text"""
+        storage = models.storage
+        place = Place(name="Search", description="zebra loft")
+        reviews = [Review(place_id=place.id, text="Zebra zebra, quokka!"),
+                   Review(place_id=place.id, text="a quokka"),
+                   Review(place_id="other", text="quokka zebra"),
+                   Review(place_id=place.id, text="nothing to see")]
+        for obj in [place] + reviews:
+            storage.new(obj)
+        found = storage.search(Review, "zebra quokka",
+                               filter_by={"place_id": place.id})
+        self.assertEqual(found[0], reviews[0])
+        self.assertEqual(set(found), set(reviews[:2]))
+        scores = [storage.relevance(review, "zebra quokka")
+                  for review in found]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        after = (scores[0], found[0].id)
+        self.assertEqual(storage.search(Review, "zebra quokka", after=after,
+                                        filter_by={"place_id": place.id}),
+                         found[1:])
+        reviews[1].text = "gone"
+        self.assertEqual(storage.search(Review, "quokka",
+                                        filter_by={"place_id": place.id}),
+                         [reviews[0]])
+        self.assertEqual(storage.search_places(text="ZEBRA",
+                                               where=[("name", "==",
+                                                       "Search")]), [place])
+        self.assertEqual(storage.search_places(text="quokka",
+                                               cities=[place.city_id]), [])
+        with self.assertRaises(ValueError):
+            storage.search(Review, "?!")
+        with self.assertRaises(ValueError):
+            storage.search(State, "zebra")
+        for obj in [place] + reviews:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_search_places(self):
+        """Test that search_places combines states, cities and amenities"""
+        storage = models.storage
+        state = State(name="Search")
+        cities = [City(name=str(i), state_id=state.id) for i in range(2)]
+        other = City(name="other", state_id="nop")
+        wifi, pool = Amenity(name="wifi"), Amenity(name="pool")
+        places = [Place(city_id=cities[0].id, amenity_ids=[wifi.id]),
+                  Place(city_id=cities[1].id,
+                        amenity_ids=[wifi.id, pool.id]),
+                  Place(city_id=other.id, amenity_ids=[pool.id])]
+        objs = [state, other, wifi, pool] + cities + places
+        for obj in objs:
+            storage.new(obj)
+
+        def search(**kwargs):
+            """returns the ids of the places found"""
+            return {place.id for place in storage.search_places(**kwargs)}
+        ids = [place.id for place in places]
+        self.assertEqual(search(states=[state.id]), set(ids[:2]))
+        self.assertEqual(search(states=[state.id], cities=[other.id]),
+                         set(ids))
+        self.assertEqual(search(cities=[other.id, "nop"]), {ids[2]})
+        self.assertEqual(search(states=[state.id], amenities=[wifi.id]),
+                         set(ids[:2]))
+        self.assertEqual(search(amenities=[wifi.id, pool.id, "nop"]),
+                         {ids[1]})
+        self.assertTrue(set(ids) <= search())
+        first = storage.search_places(cities=[other.id] + [c.id for c
+                                                           in cities],
+                                      order_by=("created_at", "id"),
+                                      limit=1)
+        self.assertEqual(first, [places[0]])
+        self.assertEqual(search(amenities_any=[pool.id, "nop"]),
+                         set(ids[1:]))
+        self.assertEqual(search(cities=[other.id], amenities=[pool.id],
+                                amenities_any=[wifi.id]), set())
+        places[0].amenity_ids = [pool.id]
+        self.assertEqual(search(amenities=[pool.id]), set(ids))
+        for place, (lat, lon) in zip(places, [(48.8566, 2.3522),
+                                              (48.8606, 2.3376),
+                                              (45.764, 4.8357)]):
+            place.latitude, place.longitude = lat, lon
+        self.assertEqual(search(bbox=[48, 2, 49, 3]), set(ids[:2]))
+        near = [place.id for place in storage.search_places(
+            near=(48.861, 2.336, 500))]
+        self.assertEqual(near, [ids[1], ids[0], ids[2]])
+        self.assertEqual(search(near=(48.861, 2.336, 5),
+                                amenities=[wifi.id, pool.id]), {ids[1]})
+        with self.assertRaises(ValueError):
+            search(bbox=[1, 2, 3])
+        for place, (rooms, price) in zip(places, [(1, 90), (3, 120),
+                                                  (2, 200)]):
+            place.number_rooms, place.price_by_night = rooms, price
+        cheap = storage.search_places(
+            where=[("number_rooms", ">=", 2), ("price_by_night", "<", 150),
+                   ("price_by_night", "<=", 500)],
+            order_by=("price_by_night", "id"))
+        self.assertIn(places[1], cheap)
+        self.assertNotIn(places[0], cheap)
+        self.assertNotIn(places[2], cheap)
+        prices = [place.price_by_night for place in storage.find(
+            Place, where=[("price_by_night", ">", 80)],
+            order_by="-price_by_night")]
+        self.assertEqual(prices, sorted(prices, reverse=True))
+        self.assertTrue({200, 120, 90} <= set(prices))
+        self.assertTrue(all(price > 80 for price in prices))
+        for obj in objs:
+            storage.delete(obj)
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Contains the TestGeoDocs and TestGeo classes
+"""
+
+from models.engine import geo
+import pep8
+import unittest
+
+
+class TestGeoDocs(unittest.TestCase):
+    """Tests to check the documentation and style of geo"""
+
+    def test_pep8_conformance_geo(self):
+        """Test that models/engine/geo.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/geo.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_geo.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_geo_module_docstring(self):
+        """Test for the geo.py module docstring"""
+        self.assertIsNot(geo.__doc__, None, "geo.py needs a docstring")
+
+
+class TestGeo(unittest.TestCase):
+    """Test the distances and areas of geo"""
+
+    def test_distance(self):
+        """Test the great-circle distance between two cities"""
+        self.assertAlmostEqual(geo.distance(48.8566, 2.3522,
+                                            51.5072, -0.1276), 343.9, 0)
+        self.assertEqual(geo.distance(10, 20, 10, 20), 0)
+
+    def test_bbox_around(self):
+        """Test that bbox_around holds the points within the radius"""
+        for latitude, longitude in ((48.85, 2.35), (-60, 179.9), (89, 0)):
+            box = geo.bbox_around(latitude, longitude, 100)
+            for bearing in range(0, 360, 15):
+                lat = latitude + 0.89 * geo.cos(geo.radians(bearing))
+                lon = longitude + 0.89 * geo.sin(geo.radians(bearing)) / \
+                    geo.cos(geo.radians(latitude))
+                lon = (lon + 180) % 360 - 180
+                if lat < 90 and geo.distance(latitude, longitude, lat,
+                                             lon) <= 100:
+                    self.assertTrue(geo.in_bbox(lat, lon, box))
+
+    def test_checks(self):
+        """Test that invalid areas raise ValueError"""
+        with self.assertRaises(ValueError):
+            geo.check_bbox([10, 0, 5, 1])
+        with self.assertRaises(ValueError):
+            geo.check_near([0, 200, 1])
+        with self.assertRaises(ValueError):
+            geo.check_near([0, 0, "nan"])
+        self.assertEqual(geo.check_near(["1", 2, 3]), (1.0, 2.0, 3.0))
+
+    def test_by_distance(self):
+        """Test that by_distance keeps the places within the radius"""
+        class Spot:
+            """a place-like point"""
+            def __init__(self, id, latitude, longitude):
+                """Instantiate a spot"""
+                self.id = id
+                self.latitude = latitude
+                self.longitude = longitude
+        spots = [Spot("far", 0, 5), Spot("b", 0, 0.1), Spot("a", 0, -0.1),
+                 Spot("here", 0, 0)]
+        found = geo.by_distance(spots, (0, 0, 50))
+        self.assertEqual([spot.id for km, spot in found], ["here", "a", "b"])
+        after = (found[1][0], "a")
+        self.assertEqual([spot.id for km, spot in geo.by_distance(
+            spots, (0, 0, 50), after)], ["b"])
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+"""
+Contains the TestIndexesDocs, TestSortedIndex, TestBitmapIndex,
+TestGridIndex and TestTextIndex classes
+"""
+
+from models.engine import indexes
+from models.engine.indexes import BitmapIndex, GridIndex, SortedIndex, \
+    TextIndex
+import pep8
+import unittest
+
+
+class TestIndexesDocs(unittest.TestCase):
+    """Tests to check the documentation and style of indexes"""
+
+    def test_pep8_conformance_indexes(self):
+        """Test that models/engine/indexes.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/indexes.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_indexes.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_indexes_module_docstring(self):
+        """Test for the indexes.py module docstring"""
+        self.assertIsNot(indexes.__doc__, None,
+                         "indexes.py needs a docstring")
+        for cls in (indexes.FieldIndex, SortedIndex, BitmapIndex,
+                    GridIndex, TextIndex):
+            self.assertIsNot(cls.__doc__, None,
+                             "{} needs a docstring".format(cls.__name__))
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Test the index of keys sorted by a sort key"""
+
+    def test_after(self):
+        """Test that after yields the keys past a sort key, in order"""
+        index = SortedIndex()
+        index.update([("c", (3,)), ("a", (1,)), ("b", (2,))])
+        index.add("d", (0,))
+        index.add("a", (4,))
+        self.assertEqual(list(index.after()), ["d", "b", "c", "a"])
+        self.assertEqual(list(index.after((2,))), ["c", "a"])
+        index.remove("c")
+        self.assertEqual(list(index.after((2,))), ["a"])
+        self.assertEqual(list(index.before((4,))), ["b", "d"])
+
+    def test_span(self):
+        """Test that between yields the keys of a range of first values"""
+        index = SortedIndex()
+        index.update([(str(i), (i % 5, str(i))) for i in range(20)] +
+                     [("none", (None, "none"))])
+
+        def between(*bounds):
+            """returns the keys in range as ints"""
+            return sorted(int(key) for key in index.between(*bounds))
+        self.assertEqual(between(3), [3, 4, 8, 9, 13, 14, 18, 19])
+        self.assertEqual(between(3, True), [4, 9, 14, 19])
+        self.assertEqual(between(None, False, 1),
+                         [0, 1, 5, 6, 10, 11, 15, 16])
+        self.assertEqual(between(1, True, 2, True), [])
+        self.assertEqual(between(2, False, 2), [2, 7, 12, 17])
+        self.assertEqual(len(list(index.between())), 20)
+
+    def test_mixed_types(self):
+        """Test that values of different types are ranked, not compared"""
+        index = SortedIndex()
+        index.update([("1", (1, "1")), ("2", (2.5, "2"))])
+        index.add("cheap", ("cheap", "cheap"))
+        index.add("none", (None, "none"))
+        index.add("list", ([1], "list"))
+        index.add("1", ("one", "1"))
+        self.assertEqual(list(index.after()),
+                         ["none", "2", "cheap", "1", "list"])
+        self.assertEqual(list(index.between(0)), ["2"])
+        self.assertEqual(list(index.between(None, False, 3)), ["2"])
+        self.assertEqual(list(index.between("a")), ["cheap", "1"])
+        index.remove("cheap")
+        self.assertEqual(sorted(index.values), ["1", "2", "list", "none"])
+
+
+class TestBitmapIndex(unittest.TestCase):
+    """Test the inverted index of bitmaps"""
+
+    def test_all_of_any_of(self):
+        """Test that bitmaps intersect and unite the keys of values"""
+        index = BitmapIndex()
+        index.update([("p1", ["wifi", "pool"]), ("p2", ["wifi"]),
+                      ("p3", [])])
+        index.add("p4", ["pool", "tv"])
+        self.assertEqual(set(index.members(index.all_of(["wifi", "pool"]))),
+                         {"p1"})
+        self.assertEqual(set(index.members(index.any_of(["wifi", "tv"]))),
+                         {"p1", "p2", "p4"})
+        self.assertEqual(list(index.members(index.all_of(["nop"]))), [])
+
+    def test_changes_reuse_ordinals(self):
+        """Test that removed keys leave the bitmaps and free their ordinal"""
+        index = BitmapIndex()
+        for i in range(100):
+            index.add(str(i), ["odd" if i % 2 else "even"])
+        index.add("3", ["even"])
+        index.remove("0")
+        even = list(index.members(index.get("even")))
+        self.assertNotIn("0", even)
+        self.assertIn("3", even)
+        self.assertNotIn("3", index.members(index.get("odd")))
+        index.add("new", ["even"])
+        self.assertEqual(len(index.keys), 100)
+        self.assertEqual(len(list(index.members(index.get("even")))), 51)
+
+    def test_unhashable_items(self):
+        """Test that items which cannot be dictionary keys are left out"""
+        for index in (BitmapIndex(), indexes.FieldIndex()):
+            with self.subTest(index=type(index).__name__):
+                index.update([("p1", ["wifi", {"x": 1}]), ("p2", {"x": 1})])
+                index.add("p3", ["wifi"])
+                index.add("p3", [["tv"], "wifi", {"x": 1}])
+                self.assertEqual(index.values,
+                                 {"p1": ("wifi",), "p2": (), "p3": ("wifi",)})
+
+
+class TestGridIndex(unittest.TestCase):
+    """Test the grid index of points"""
+
+    def test_within(self):
+        """Test that within finds the points of a bbox, across cells"""
+        index = GridIndex()
+        index.update([("paris", (48.8566, 2.3522)),
+                      ("lyon", (45.764, 4.8357)),
+                      ("fiji", (-17.7134, 178.065)),
+                      ("samoa", (-13.759, -172.1046)),
+                      ("nowhere", (None, None))])
+        self.assertEqual(set(index.within((45, 2, 49, 5))), {"paris", "lyon"})
+        self.assertEqual(set(index.within((48, 2, 49, 3))), {"paris"})
+        self.assertEqual(set(index.within((-20, 170, -10, -170))),
+                         {"fiji", "samoa"})
+        index.add("paris", (51.5072, -0.1276))
+        index.remove("lyon")
+        self.assertEqual(set(index.within((45, 2, 49, 5))), set())
+        self.assertEqual(set(index.within((-90, -180, 90, 180))),
+                         {"paris", "fiji", "samoa"})
+
+
+class TestTextIndex(unittest.TestCase):
+    """Test the inverted index of words"""
+
+    def test_scores(self):
+        """Test that scores ranks the keys holding a word of the query"""
+        index = TextIndex()
+        index.update([("a", "quiet loft with a garden view"),
+                      ("b", "garden garden garden"),
+                      ("c", "loud street"),
+                      ("d", None)])
+        scores = index.scores(["garden", "quiet"])
+        self.assertEqual(set(scores), {"a", "b"})
+        self.assertGreater(scores["a"], scores["b"])
+        self.assertEqual(index.score("a", ["garden", "quiet"]), scores["a"])
+        self.assertEqual(index.score("c", ["garden"]), 0.0)
+        self.assertEqual(index.scores(["nowhere"]), {})
+
+    def test_changes(self):
+        """Test that changed and removed texts leave the postings"""
+        index = TextIndex()
+        index.add("a", "garden")
+        index.add("b", "garden view")
+        index.add("a", "street")
+        self.assertEqual(set(index.scores(["garden"])), {"b"})
+        index.remove("b")
+        index.remove("nop")
+        self.assertEqual(index.scores(["garden", "view"]), {})
+        self.assertEqual(index.total, 1)
+        self.assertEqual(set(index.scores(["street"])), {"a"})
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""
+Contains the TestJSONCodecDocs and TestIterItems classes
+"""
+
+import io
+import json
+from models.engine import json_codec
+import pep8
+import unittest
+
+
+class TestJSONCodecDocs(unittest.TestCase):
+    """Tests to check the documentation and style of json_codec"""
+
+    def test_pep8_conformance_json_codec(self):
+        """Test that models/engine/json_codec.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/json_codec.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_json_codec.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_json_codec_module_docstring(self):
+        """Test for the json_codec.py module docstring"""
+        self.assertIsNot(json_codec.__doc__, None,
+                         "json_codec.py needs a docstring")
+        self.assertIsNot(json_codec.iter_items.__doc__, None,
+                         "iter_items needs a docstring")
+
+
+class TestIterItems(unittest.TestCase):
+    """Test the streaming parser of JSON objects"""
+
+    def test_matches_json_loads(self):
+        """Test that every chunk size gives the pairs json.loads does"""
+        data = {"Place.1": {"name": "A {\"quoted\"}: b,", "rooms": 12345,
+                            "ids": [1, 2.5e10, -0.25], "ok": True},
+                "State.2": {"name": "", "none": None}, "empty": {}}
+        for text in (json.dumps(data), json.dumps(data, indent=4)):
+            for size in (1, 2, 3, 7, 1 << 16):
+                with self.subTest(size=size):
+                    pairs = list(json_codec.iter_items(io.StringIO(text),
+                                                       size))
+                    self.assertEqual(pairs, list(data.items()))
+
+    def test_empty_object(self):
+        """Test that an empty object yields nothing"""
+        self.assertEqual(list(json_codec.iter_items(io.StringIO(" {} "))),
+                         [])
+
+    def test_truncated_file(self):
+        """Test that a truncated object raises ValueError"""
+        with self.assertRaises(ValueError):
+            list(json_codec.iter_items(io.StringIO('{"a": {"b": 1}'), 4))
+
+    def test_codecs_agree(self):
+        """Test that every installed codec decodes what it encodes"""
+        data = {"a": [1, "é/", {"b": None}]}
+        for name, codec in json_codec.codecs.items():
+            with self.subTest(codec=name):
+                self.assertEqual(codec.loads(codec.dumps(data)), data)
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Contains the TestPoolDocs and TestTimedQueuePool classes
+"""
+
+from models.engine import pool
+from models.engine.pool import TimedQueuePool, WaitHistogram
+import pep8
+import sqlalchemy
+import unittest
+
+
+class TestPoolDocs(unittest.TestCase):
+    """Tests to check the documentation and style of pool"""
+
+    def test_pep8_conformance_pool(self):
+        """Test that models/engine/pool.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/pool.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_pool.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pool_module_docstring(self):
+        """Test for the pool.py module docstring"""
+        self.assertIsNot(pool.__doc__, None, "pool.py needs a docstring")
+        for cls in (TimedQueuePool, WaitHistogram):
+            self.assertIsNot(cls.__doc__, None,
+                             "{} needs a docstring".format(cls.__name__))
+
+
+class TestTimedQueuePool(unittest.TestCase):
+    """Test the statistics of the connection pool"""
+
+    def test_histogram(self):
+        """Test that durations fall in the bucket of their upper bound"""
+        histogram = WaitHistogram()
+        for ms in (0.5, 1, 7, 20000):
+            histogram.record(ms)
+        stats = histogram.to_dict()
+        self.assertEqual(stats["count"], 4)
+        self.assertEqual(stats["max_ms"], 20000)
+        self.assertEqual(stats["buckets"]["1"], 2)
+        self.assertEqual(stats["buckets"]["10"], 1)
+        self.assertEqual(stats["buckets"]["+Inf"], 1)
+
+    def test_stats(self):
+        """Test that checkouts, overflow and timeouts are counted"""
+        engine = sqlalchemy.create_engine("sqlite://",
+                                          poolclass=TimedQueuePool,
+                                          pool_size=1, max_overflow=1,
+                                          pool_timeout=0.01)
+        first, second = engine.connect(), engine.connect()
+        stats = engine.pool.stats()
+        self.assertEqual(stats["checked_out"], 2)
+        self.assertEqual(stats["overflow"], 1)
+        with self.assertRaises(sqlalchemy.exc.TimeoutError):
+            engine.connect()
+        first.close()
+        second.close()
+        stats = engine.pool.stats()
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["wait"]["count"], 3)
+        self.assertGreaterEqual(stats["wait"]["max_ms"], 10)
+        engine.dispose()
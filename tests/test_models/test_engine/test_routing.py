@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""
+Contains the TestRoutingDocs and TestRoutingSession classes
+"""
+
+from models.engine import routing
+from models.engine.routing import RoutingSession
+import os
+import pep8
+import sqlalchemy
+from sqlalchemy.orm import declarative_base, sessionmaker
+import tempfile
+import unittest
+
+Base = declarative_base()
+
+
+class Thing(Base):
+    """a row of a table held by a primary and its replica"""
+    __tablename__ = "things"
+    id = sqlalchemy.Column(sqlalchemy.String(60), primary_key=True)
+
+
+class TestRoutingDocs(unittest.TestCase):
+    """Tests to check the documentation and style of routing"""
+
+    def test_pep8_conformance_routing(self):
+        """Test that models/engine/routing.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/routing.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_routing.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_routing_module_docstring(self):
+        """Test for the routing.py module docstring"""
+        self.assertIsNot(routing.__doc__, None,
+                         "routing.py needs a docstring")
+        self.assertIsNot(RoutingSession.__doc__, None,
+                         "RoutingSession needs a docstring")
+
+
+class TestRoutingSession(unittest.TestCase):
+    """Test that reads go to the replica until the session writes"""
+
+    def setUp(self):
+        """Make a primary and a replica holding different rows"""
+        self.folder = tempfile.TemporaryDirectory()
+        self.engines = []
+        for name in ("primary", "replica"):
+            engine = sqlalchemy.create_engine("sqlite:///" + os.path.join(
+                self.folder.name, name + ".db"))
+            Base.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(Thing.__table__.insert(), [{"id": name}])
+            self.engines.append(engine)
+        self.Session = sessionmaker(bind=self.engines[0],
+                                    class_=RoutingSession,
+                                    replicas=self.engines[1:])
+
+    def tearDown(self):
+        """Remove the databases"""
+        for engine in self.engines:
+            engine.dispose()
+        self.folder.cleanup()
+
+    def ids(self, session):
+        """returns the ids of the things session reads"""
+        return sorted(thing.id for thing in session.query(Thing))
+
+    def test_reads_your_writes(self):
+        """Test that a session reads from the primary once it wrote"""
+        session = self.Session()
+        self.assertEqual(self.ids(session), ["replica"])
+        session.add(Thing(id="new"))
+        session.commit()
+        self.assertEqual(self.ids(session), ["new", "primary"])
+        session.close()
+        session = self.Session()
+        self.assertEqual(self.ids(session), ["replica"])
+        session.query(Thing).filter(Thing.id == "new").delete()
+        self.assertEqual(self.ids(session), ["primary"])
+        session.commit()
+        session.close()
+
+    def test_sticky(self):
+        """Test that a sticky session or one without replica reads primary"""
+        session = self.Session()
+        session.sticky = True
+        self.assertEqual(self.ids(session), ["primary"])
+        session.close()
+        session = sessionmaker(bind=self.engines[0],
+                               class_=RoutingSession)()
+        self.assertEqual(self.ids(session), ["primary"])
+        session.close()
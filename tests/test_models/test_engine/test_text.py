@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""
+Contains the TestTextDocs and TestText classes
+"""
+
+from models.engine import text
+import pep8
+import unittest
+
+
+class TestTextDocs(unittest.TestCase):
+    """Tests to check the documentation and style of text"""
+
+    def test_pep8_conformance_text(self):
+        """Test that models/engine/text.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/text.py',
+                                    'tests/test_models/test_engine/'
+                                    'test_text.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_text_module_docstring(self):
+        """Test for the text.py module docstring"""
+        self.assertIsNot(text.__doc__, None, "text.py needs a docstring")
+
+
+class TestText(unittest.TestCase):
+    """Test the words and weights of text"""
+
+    def test_tokenize(self):
+        """Test that texts split into lowercase words"""
+        self.assertEqual(text.tokenize("A quiet, sunny Loft!"),
+                         ["a", "quiet", "sunny", "loft"])
+        self.assertEqual(text.tokenize(None), [])
+        self.assertEqual(text.check_text("Loft loft view"), ["loft", "view"])
+        for bad in ("", " ?! ", None, 3):
+            with self.assertRaises(ValueError):
+                text.check_text(bad)
+        with self.assertRaises(ValueError):
+            text.text_field("State")
+
+    def test_bm25(self):
+        """Test that rare words, repeats and short texts weigh more"""
+        weight = text.bm25(1, 10, 10, 2, 100)
+        self.assertGreater(weight, text.bm25(1, 10, 10, 50, 100))
+        self.assertGreater(text.bm25(3, 10, 10, 2, 100), weight)
+        self.assertGreater(text.bm25(1, 5, 10, 2, 100), weight)
+        self.assertTrue(text.is_ranked_after(1.0, "a", (2.0, "z")))
+        self.assertTrue(text.is_ranked_after(2.0, "b", (2.0, "a")))
+        self.assertFalse(text.is_ranked_after(2.0, "a", (2.0, "a")))